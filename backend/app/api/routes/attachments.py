@@ -10,38 +10,45 @@ router = APIRouter(
     tags=["attachments"],
 )
 
-ALLOWED_CONTENT_TYPES = {
+ALLOWED_CONTENT_TYPES = frozenset({
     "application/pdf",
     "text/plain",
     "text/markdown",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-}
+})
 
-ALLOWED_EXTENSIONS = {".pdf", ".txt", ".md", ".docx"}
+ALLOWED_EXTENSIONS = frozenset({".pdf", ".txt", ".md", ".docx"})
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 
+# Read uploads in 1 MB pieces so oversize bodies are rejected early
+_READ_CHUNK_SIZE = 1024 * 1024
+
 
 @router.post("", response_model=AttachmentSummary)
 async def upload_attachment(discussion_id: str, file: UploadFile = File(...), _user_id: str = Depends(get_current_user_id)):
     """Upload a file as a conversation attachment (not indexed into Pinecone)."""
     filename = file.filename or "unknown"
-    extension = "." + filename.split(".")[-1].lower() if "." in filename else ""
+    _, dot, suffix = filename.rpartition(".")
+    extension = "." + suffix.lower() if dot else ""
 
     if file.content_type not in ALLOWED_CONTENT_TYPES and extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type. Allowed: {ALLOWED_EXTENSIONS}",
+            detail=f"Unsupported file type. Allowed: {set(ALLOWED_EXTENSIONS)}",
         )
 
-    content = await file.read()
+    # Read file content in pieces, bailing out as soon as the limit is crossed
+    buf = bytearray()
+    while chunk := await file.read(_READ_CHUNK_SIZE):
+        buf += chunk
+        if len(buf) > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB")
+    content = bytes(buf)
 
     if len(content) == 0:
         raise HTTPException(status_code=400, detail="Empty file")
 
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
-
     svc = get_attachment_service()
 
     try:
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
 from typing import List, Optional
 from datetime import datetime
 import uuid
 import time
-import json
 import asyncio
+import heapq
 import logging
 import re
 
@@ -17,12 +17,12 @@ from app.core.research_modes import (
     list_research_modes as get_all_research_modes,
     DEFAULT_RESEARCH_MODE,
 )
-from app.models import Message, MessageRole, DocumentSource
+from app.models import Message, MessageRole, DocumentSource, ROLE_VALUES
 from app.providers import ProviderRegistry
 from app.services.document_service import get_document_service
 from app.services.attachment_service import get_attachment_service
 from app.services.discussion_service import get_discussion_service
-from app.utils.streaming import create_sse_response, format_sse_event
+from app.utils.streaming import coalesce_chunks, format_sse_event, stream_sse_chunks
 from app.services.intent_classifier import classify_intent
 from app.auth import get_current_user_id
 
@@ -30,11 +30,29 @@ router = APIRouter(prefix="/api/chat", tags=["chat"])
 logger = logging.getLogger(__name__)
 
 _CITATION_RE = re.compile(r'\[\d+\]')
+_MULTISPACE_RE = re.compile(r'  +')
+
+# Seconds between SSE keep-alive comments, so proxies don't drop the
+# connection while a provider is slow to produce its first token
+_SSE_PING_SECONDS = 15
+
+# How long `done` may wait on suggested questions before they are skipped
+_SUGGESTIONS_TIMEOUT = 3.0
 
 # Fallback minimum cosine similarity (used only if research config lacks min_score)
 _MIN_SCORE = 0.40
 
 
+def _event_stream(frames) -> EventSourceResponse:
+    """Serve pre-encoded SSE frames with keep-alive pings and no-buffering headers.
+
+    Bytes frames pass through untouched.  The frontend splits events on a
+    blank LF line, so pings must use LF rather than the library's default
+    CRLF separator.
+    """
+    return EventSourceResponse(frames, ping=_SSE_PING_SECONDS, sep="\n")
+
+
 def _extract_query_terms(query: str) -> List[str]:
     """Extract meaningful terms from a query for entity-content matching.
 
@@ -181,10 +199,11 @@ def _sanitize_history_messages(messages: List[Message]) -> List[Message]:
             # Strip old citation markers — they reference different sources
             content = _CITATION_RE.sub('', msg.content).strip()
             # Collapse runs of whitespace left by stripped citations
-            content = re.sub(r'  +', ' ', content)
+            content = _MULTISPACE_RE.sub(' ', content)
             if len(content) > MAX_CHARS:
                 content = content[:MAX_CHARS].rsplit(' ', 1)[0] + " [earlier response truncated]"
-            sanitized.append(Message(
+            # Every field comes from an already-validated Message
+            sanitized.append(Message.model_construct(
                 id=msg.id,
                 content=content,
                 role=msg.role,
@@ -217,9 +236,11 @@ async def _rewrite_search_query(
         return current_message
 
     try:
-        from mistralai import Mistral
-
-        client = Mistral(api_key=settings.mistral_api_key)
+        # Reuse the registered Mistral provider's client rather than
+        # wrapping the shared HTTP pool in a new SDK client per request
+        client = ProviderRegistry.get_provider(
+            "mistral", settings.mistral_api_key, settings.mistral_model
+        ).client
 
         # Compact history: last few user messages (excluding the current one,
         # which was already added to the DB before context_messages was fetched)
@@ -303,20 +324,15 @@ async def stream_chat(
         raise HTTPException(status_code=404, detail="Discussion not found")
 
     # Get provider configuration
-    provider_configs = {
-        "openai": (settings.openai_api_key, settings.openai_model),
-        "mistral": (settings.mistral_api_key, settings.mistral_model),
-        "claude": (settings.anthropic_api_key, settings.anthropic_model),
-        "cohere": (settings.cohere_api_key, settings.cohere_model),
-    }
-
-    if request.provider not in provider_configs:
+    provider_configs = settings.provider_configs
+    provider_config = provider_configs.get(request.provider)
+    if provider_config is None:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid provider: {request.provider}. Valid providers: {list(provider_configs.keys())}"
         )
 
-    api_key, model = provider_configs[request.provider]
+    api_key, model = provider_config
     if not api_key:
         raise HTTPException(
             status_code=400,
@@ -418,6 +434,8 @@ async def stream_chat(
     # Now await the RAG results (if Pinecone was queried)
     context = None
     sources: List[DocumentSource] = []
+    # Wire form of `sources` for the SSE event, built alongside it
+    sources_payload: List[dict] = []
     pre_filtered = search_doc_ids is not None
     if rag_task is not None:
         try:
@@ -439,7 +457,8 @@ async def stream_chat(
                 if not metadata:
                     continue
 
-                content_lower = metadata.get("content", "").lower()
+                content = metadata.get("content", "")
+                content_lower = content.lower()
 
                 # Entity-aware re-ranking: boost chunks whose content
                 # mentions the queried entity (person name, topic, etc.)
@@ -464,7 +483,6 @@ async def stream_chat(
                     doc_id = metadata.get("document_id", result["id"])
                     chunk_id = result.get("id")
                     filename = metadata.get("filename", "Unknown")
-                    content = metadata.get("content", "")
 
                     if doc_id not in doc_groups:
                         doc_groups[doc_id] = {
@@ -484,33 +502,34 @@ async def stream_chat(
 
             # Cap to research_config.top_k documents (over-fetch was for
             # casting a wider net; now trim back to the requested depth).
-            sorted_groups = sorted(
+            sorted_groups = heapq.nlargest(
+                research_config.top_k,
                 doc_groups.items(),
                 key=lambda item: item[1]["best_score"],
-                reverse=True,
-            )[:research_config.top_k]
+            )
 
             # Build context and sources from deduplicated groups
             context_parts = []
-            citation_number = 1
 
-            for doc_id, group in sorted_groups:
+            for citation_number, (doc_id, group) in enumerate(sorted_groups, start=1):
                 combined_content = "\n\n".join(group["chunks"])
                 # Strip bracketed reference numbers from source text (e.g. [48], [52])
                 # so the AI doesn't confuse them with our [Source N] citation numbers
                 combined_content = _CITATION_RE.sub('', combined_content)
-                combined_content = re.sub(r'  +', ' ', combined_content).strip()
+                combined_content = _MULTISPACE_RE.sub(' ', combined_content).strip()
                 context_parts.append(f"[Source {citation_number} - {group['filename']}]:\n{combined_content}")
 
-                sources.append(DocumentSource(
-                    id=doc_id,
-                    filename=group["filename"],
-                    score=round(group["best_score"], 3),
-                    chunk_preview=group["best_preview"],
-                    citation_number=citation_number,
-                    chunk_id=group["best_chunk_id"],
-                ))
-                citation_number += 1
+                source_fields = {
+                    "id": doc_id,
+                    "filename": group["filename"],
+                    "score": round(group["best_score"], 3),
+                    "chunk_preview": group["best_preview"],
+                    "citation_number": citation_number,
+                    "chunk_id": group["best_chunk_id"],
+                }
+                sources_payload.append(source_fields)
+                # Every field is built here from our own index metadata
+                sources.append(DocumentSource.model_construct(**source_fields))
 
             if context_parts:
                 context = "\n\n---\n\n".join(context_parts)
@@ -538,12 +557,8 @@ async def stream_chat(
                 "openclimatecurriculum@gsb.columbia.edu for assistance."
             )
             async def _error_stream():
-                yield f"data: {json.dumps({'type': 'error', 'error': error_msg, 'provider': request.provider})}\n\n"
-            return StreamingResponse(
-                _error_stream(),
-                media_type="text/event-stream",
-                headers={"Cache-Control": "no-cache", "Connection": "keep-alive", "X-Accel-Buffering": "no"},
-            )
+                yield format_sse_event("error", {"error": error_msg, "provider": request.provider})
+            return _event_stream(_error_stream())
 
     # Inject conversation-scoped attachment context (never touches Pinecone)
     attachment_context = attachment_service.get_context_for_chat(
@@ -568,55 +583,61 @@ async def stream_chat(
 
         # Emit title update event first if title was updated
         if title_updated:
-            title_data = {
-                "type": "discussion_title",
+            yield format_sse_event("discussion_title", {
                 "discussion_id": request.discussion_id,
                 "title": discussion.title
-            }
-            yield f"data: {json.dumps(title_data)}\n\n"
+            })
 
         # Emit sources event (if any)
         if sources:
-            sources_data = {
-                "type": "sources",
-                "sources": [s.model_dump() for s in sources],
+            yield format_sse_event("sources", {
+                "sources": sources_payload,
                 "provider": request.provider
-            }
-            yield f"data: {json.dumps(sources_data)}\n\n"
+            })
 
         # Emit intent event
-        intent_data = {
-            "type": "intent",
+        yield format_sse_event("intent", {
             "intent": intent_result.intent,
             "label": intent_result.label
-        }
-        yield f"data: {json.dumps(intent_data)}\n\n"
-
-        # Wrap the provider stream to collect raw chunks before SSE serialization,
-        # avoiding the cost of re-parsing our own JSON output.
-        async def _collect_and_stream():
-            async for chunk in provider.stream_completion(
+        })
+
+        # Collect the raw text alongside each frame so the saved message
+        # never requires parsing our own JSON output back.
+        append_response = full_response.append
+        # Deltas arriving within a few ms of each other go out as one frame.
+        async for content, payload in stream_sse_chunks(
+            coalesce_chunks(provider.stream_completion(
                 messages=context_messages,
                 context=context,
                 temperature=request.temperature,
                 max_tokens=request.max_tokens,
                 intent_prompt=intent_result.prompt_suffix,
                 research_prompt=research_config.prompt_enhancement,
-            ):
-                full_response.append(chunk)
-                yield chunk
-
-        async for sse_event in create_sse_response(
-            _collect_and_stream(),
+                context_mode="pinecone" if sources else "attachment",
+            )),
             provider=request.provider,
             send_done=False,
         ):
-            yield sse_event
+            if content:
+                append_response(content)
+            yield payload
 
         # Save assistant response to discussion after streaming completes
         response_time = int((time.time() - start_time) * 1000)
         full_response_text = "".join(full_response)
 
+        # Start generating suggested questions straight away and build the
+        # message to persist while that request is in flight
+        suggest_task = asyncio.create_task(provider.generate_suggested_questions(
+            conversation_history=[
+                {"role": ROLE_VALUES[msg.role], "content": msg.content}
+                for msg in context_messages
+                if msg.content
+            ],
+            last_response=full_response_text,
+            count=4
+        ))
+
         assistant_message = Message(
             id=str(uuid.uuid4()),
             content=full_response_text,
@@ -628,19 +649,10 @@ async def stream_chat(
             intent=intent_result.intent,
         )
 
-        # Generate suggested questions
+        # Collect suggested questions
         try:
-            # Build conversation history for context
-            conversation_history = [
-                {"role": msg.role.value, "content": msg.content}
-                for msg in context_messages
-            ]
-
-            # Generate questions using the provider
-            suggested_questions = await provider.generate_suggested_questions(
-                conversation_history=conversation_history,
-                last_response=full_response_text,
-                count=4
+            suggested_questions = await asyncio.wait_for(
+                suggest_task, timeout=_SUGGESTIONS_TIMEOUT
             )
 
             # Send suggested questions event if any generated
@@ -653,6 +665,8 @@ async def stream_chat(
                 # Store in message object
                 assistant_message.suggested_questions = suggested_questions
 
+        except asyncio.TimeoutError:
+            logger.warning("Suggested questions timed out; skipping")
         except Exception as e:
             logger.warning(f"Failed to generate suggested questions: {e}")
             # Don't fail the whole request if question generation fails
@@ -662,15 +676,7 @@ async def stream_chat(
 
         disc_service.add_message(request.discussion_id, assistant_message)
 
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
-    )
+    return _event_stream(generate())
 
 
 @router.get("/providers")
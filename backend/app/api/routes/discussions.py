@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime
 import uuid
@@ -86,6 +86,21 @@ async def delete_all_discussions(
     return {"status": "deleted", "count": deleted_count}
 
 
+@router.get("/{discussion_id}/messages", response_model=List[Message])
+async def list_messages(
+    discussion_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    user_id: str = Depends(get_current_user_id),
+):
+    """Page through a discussion's messages without loading the full history."""
+    service = get_discussion_service()
+    messages = service.list_messages(discussion_id, user_id, offset=offset, limit=limit)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Discussion not found")
+    return messages
+
+
 @router.post("/{discussion_id}/messages", response_model=Message)
 async def add_message(
     discussion_id: str,
@@ -1,23 +1,68 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
-import json
+import hashlib
+import orjson
+import uuid
 
-from app.models import Document
+from app.core.config import get_settings
+from app.models import Document, Message, MessageRole
+from app.providers import ProviderRegistry
 from app.services.document_service import get_document_service
 
 router = APIRouter(prefix="/api/documents", tags=["documents"])
 
 # Allowed file types
-ALLOWED_CONTENT_TYPES = {
+ALLOWED_CONTENT_TYPES = frozenset({
     "application/pdf",
     "text/plain",
     "text/markdown",
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-}
+})
 
-ALLOWED_EXTENSIONS = {".pdf", ".txt", ".md", ".docx"}
+ALLOWED_EXTENSIONS = frozenset({".pdf", ".txt", ".md", ".docx"})
+
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+
+# Read uploads in 1 MB pieces so oversize bodies are rejected early
+_READ_CHUNK_SIZE = 1024 * 1024
+
+
+# Documents are immutable once uploaded, but they can be deleted, so clients
+# may keep responses only as long as they revalidate them with the ETag.
+_CACHE_CONTROL = "private, no-cache"
+
+
+def _document_etag(documents: List[Document]) -> str:
+    """Build a strong ETag from the registry metadata of the given documents.
+
+    A document ID is minted per upload and its chunks never change afterwards,
+    so ID + creation time + chunk count identify the response content.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for doc in documents:
+        digest.update(f"{doc.id}:{doc.created_at.isoformat()}:{doc.chunk_count};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match header covers this ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the validator headers."""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL},
+    )
 
 
 class SearchRequest(BaseModel):
@@ -43,25 +88,34 @@ async def upload_document(file: UploadFile = File(...)):
 
     The document will be chunked, embedded, and stored in Pinecone.
     """
+    # Oversize request bodies are refused by UploadSizeLimitMiddleware while
+    # they are still arriving; the checks below cover the file part itself.
+
     # Validate file type
     filename = file.filename or "unknown"
-    extension = "." + filename.split(".")[-1].lower() if "." in filename else ""
+    _, dot, suffix = filename.rpartition(".")
+    extension = "." + suffix.lower() if dot else ""
 
     if file.content_type not in ALLOWED_CONTENT_TYPES and extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Unsupported file type. Allowed types: {ALLOWED_EXTENSIONS}"
+            detail=f"Unsupported file type. Allowed types: {set(ALLOWED_EXTENSIONS)}"
         )
 
-    # Read file content
-    content = await file.read()
+    # Read file content in pieces, bailing out as soon as the limit is crossed
+    # (Content-Length may be absent or wrong, e.g. chunked transfer encoding)
+    parts = []
+    total = 0
+    while chunk := await file.read(_READ_CHUNK_SIZE):
+        total += len(chunk)
+        if total > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB")
+        parts.append(chunk)
+    content = b"".join(parts)
 
     if len(content) == 0:
         raise HTTPException(status_code=400, detail="Empty file")
 
-    if len(content) > 10 * 1024 * 1024:  # 10MB limit
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB")
-
     # Process document
     doc_service = get_document_service()
 
@@ -80,21 +134,37 @@ async def upload_document(file: UploadFile = File(...)):
 
 
 @router.get("", response_model=List[Document])
-async def list_documents():
+async def list_documents(request: Request, response: Response):
     """List all uploaded documents."""
     doc_service = get_document_service()
-    return doc_service.list_documents()
+    # Give a startup bootstrap from Pinecone a moment to land
+    await doc_service.wait_for_registry(timeout=2.0)
+    documents = doc_service.list_documents()
+
+    etag = _document_etag(documents)
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _CACHE_CONTROL
+    return documents
 
 
 @router.get("/{document_id}", response_model=Document)
-async def get_document(document_id: str):
+async def get_document(document_id: str, request: Request, response: Response):
     """Get document metadata."""
     doc_service = get_document_service()
     document = await doc_service.get_document(document_id)
     
     if not document:
         raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
-    
+
+    etag = _document_etag([document])
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _CACHE_CONTROL
     return document
 
 
@@ -134,12 +204,22 @@ async def search_documents(request: SearchRequest):
 
 
 @router.get("/{document_id}/content")
-async def get_document_content(document_id: str):
+async def get_document_content(document_id: str, request: Request, response: Response):
     """Get full document content with chunks for preview."""
     doc_service = get_document_service()
+
+    # Answer revalidations from the registry without fetching chunks from Pinecone
+    etag = None
+    if document := doc_service.get_registered_document(document_id):
+        etag = _document_etag([document])
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
     
     try:
         content = await doc_service.get_document_content(document_id)
+        if etag:
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = _CACHE_CONTROL
         return content
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -148,12 +228,22 @@ async def get_document_content(document_id: str):
 
 
 @router.get("/{document_id}/chunks")
-async def get_document_chunks(document_id: str):
+async def get_document_chunks(document_id: str, request: Request, response: Response):
     """Get document chunks for preview."""
     doc_service = get_document_service()
+
+    # Answer revalidations from the registry without fetching chunks from Pinecone
+    etag = None
+    if document := doc_service.get_registered_document(document_id):
+        etag = _document_etag([document])
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
     
     try:
         chunks = await doc_service.get_document_chunks(document_id)
+        if etag:
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = _CACHE_CONTROL
         return {"chunks": chunks}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -198,32 +288,15 @@ async def chat_with_document(document_id: str, request: DocumentChatRequest):
         # Get document content for context
         document_content = await doc_service.get_document_content(document_id)
         
-        # Create a temporary discussion ID for document chat
-        import uuid
-        temp_discussion_id = str(uuid.uuid4())
-        
-        # Import chat functionality
-        from app.api.routes.chat import ChatRequest
-        from app.providers import ProviderRegistry
-        from app.core.config import get_settings
-        from app.models import Message, MessageRole
-        
         # Get provider configuration
-        settings = get_settings()
-        provider_configs = {
-            "openai": (settings.openai_api_key, settings.openai_model),
-            "mistral": (settings.mistral_api_key, settings.mistral_model),
-            "claude": (settings.anthropic_api_key, settings.anthropic_model),
-            "cohere": (settings.cohere_api_key, settings.cohere_model),
-        }
-        
-        if request.provider not in provider_configs:
+        provider_config = get_settings().provider_configs.get(request.provider)
+        if provider_config is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid provider: {request.provider}"
             )
         
-        api_key, model = provider_configs[request.provider]
+        api_key, model = provider_config
         if not api_key:
             raise HTTPException(
                 status_code=400,
@@ -252,11 +325,10 @@ async def chat_with_document(document_id: str, request: DocumentChatRequest):
                 temperature=request.temperature,
                 max_tokens=request.max_tokens
             ):
-                yield f"data: {json.dumps({'type': 'chunk', 'content': chunk})}\n\n"
+                yield b"data: " + orjson.dumps({"type": "chunk", "content": chunk}) + b"\n\n"
             
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
-        
-        from fastapi.responses import StreamingResponse
+            yield b"data: " + orjson.dumps({"type": "done"}) + b"\n\n"
+
         return StreamingResponse(
             generate_response(),
             media_type="text/plain",
@@ -1,6 +1,11 @@
 """FastAPI authentication dependencies using Supabase JWT."""
 
+import hashlib
 import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
 import jwt
 from jwt import PyJWKClient
 from fastapi import Depends, HTTPException, status
@@ -15,6 +20,14 @@ _bearer_scheme = HTTPBearer()
 # JWKS client — caches keys so we don't hit the endpoint on every request.
 _jwks_client: PyJWKClient = None
 
+# Verified tokens → (user_id, expires_at).  A client reuses the same JWT for
+# its whole lifetime, so re-verifying the signature on every request is
+# wasted work.  Entries live at most _TOKEN_CACHE_TTL seconds (and never past
+# the token's own exp) to keep the revocation window small.
+_TOKEN_CACHE_TTL = 60
+_TOKEN_CACHE_MAX = 10_000
+_token_cache: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+
 
 def _get_jwks_client() -> PyJWKClient:
     """Lazy-init a PyJWKClient pointing at the Supabase JWKS endpoint."""
@@ -27,6 +40,41 @@ def _get_jwks_client() -> PyJWKClient:
     return _jwks_client
 
 
+def _token_cache_key(token: str) -> bytes:
+    """Key cache entries by a cryptographic digest, not the raw token.
+
+    The digest must be collision-resistant: a collision would let a forged
+    token skip verification and resolve to another user's ID.
+    """
+    return hashlib.blake2b(token.encode(), digest_size=32).digest()
+
+
+def _get_cached_user_id(key: bytes) -> Optional[str]:
+    """Return the user ID for a previously verified, unexpired token."""
+    entry = _token_cache.get(key)
+    if entry is None:
+        return None
+    user_id, expires_at = entry
+    if expires_at <= time.time():
+        _token_cache.pop(key, None)
+        return None
+    _token_cache.move_to_end(key)
+    return user_id
+
+
+def _cache_user_id(key: bytes, user_id: str, payload: dict) -> None:
+    """Remember a verified token until min(exp, now + TTL), evicting LRU entries."""
+    now = time.time()
+    expires_at = now + _TOKEN_CACHE_TTL
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, exp)
+    _token_cache[key] = (user_id, expires_at)
+    _token_cache.move_to_end(key)
+    while len(_token_cache) > _TOKEN_CACHE_MAX:
+        _token_cache.popitem(last=False)
+
+
 async def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Depends(_bearer_scheme),
 ) -> str:
@@ -38,6 +86,10 @@ async def get_current_user_id(
     settings = get_settings()
     token = credentials.credentials
 
+    cache_key = _token_cache_key(token)
+    if cached_user_id := _get_cached_user_id(cache_key):
+        return cached_user_id
+
     try:
         header = jwt.get_unverified_header(token)
         token_alg = header.get("alg", "HS256")
@@ -90,4 +142,5 @@ async def get_current_user_id(
             detail="Token missing user identifier",
         )
 
+    _cache_user_id(cache_key, user_id, payload)
     return user_id
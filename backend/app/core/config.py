@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
-from functools import lru_cache
-from typing import List
+from functools import cached_property, lru_cache
+from typing import Dict, List, Tuple
 
 
 class Settings(BaseSettings):
@@ -35,11 +35,36 @@ class Settings(BaseSettings):
     debug: bool = True
     log_level: str = "INFO"
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @cached_property
+    def provider_configs(self) -> Dict[str, Tuple[str, str]]:
+        """(api_key, model) for each AI provider, keyed by provider name."""
+        return {
+            "openai": (self.openai_api_key, self.openai_model),
+            "mistral": (self.mistral_api_key, self.mistral_model),
+            "claude": (self.anthropic_api_key, self.anthropic_model),
+            "cohere": (self.cohere_api_key, self.cohere_model),
+        }
+
+    @cached_property
+    def providers_configured(self) -> Dict[str, bool]:
+        """Which AI providers have an API key set, keyed by provider name."""
+        return {
+            "openai": bool(self.openai_api_key),
+            "mistral": bool(self.mistral_api_key),
+            "claude": bool(self.anthropic_api_key),
+            "cohere": bool(self.cohere_api_key),
+        }
+
+    @cached_property
+    def pinecone_configured(self) -> bool:
+        """Whether a Pinecone API key is set."""
+        return bool(self.pinecone_api_key)
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
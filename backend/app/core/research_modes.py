@@ -18,7 +18,7 @@ class ResearchMode(str, Enum):
     DEEP = "deep"
 
 
-@dataclass
+@dataclass(frozen=True)
 class ResearchModeConfig:
     """Configuration for a research mode."""
     mode: ResearchMode
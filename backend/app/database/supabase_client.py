@@ -4,9 +4,20 @@ Initializes connection using application settings.
 """
 from supabase import create_client, Client
 from typing import Optional
+import dataclasses
+import logging
+
+import httpx
 
 from app.core.config import get_settings
 
+try:  # supabase-py releases that accept a caller-supplied httpx client
+    from supabase import SyncClientOptions
+except ImportError:  # pragma: no cover - older supabase-py
+    SyncClientOptions = None
+
+logger = logging.getLogger(__name__)
+
 # Global client instance
 _supabase_client: Optional[Client] = None
 
@@ -34,11 +45,35 @@ def get_supabase_client() -> Client:
                 "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (or SUPABASE_KEY) must be set"
             )
 
-        _supabase_client = create_client(supabase_url, supabase_key)
-        print(f"✓ Supabase client initialized: {supabase_url}")
+        options = _client_options()
+        if options is not None:
+            _supabase_client = create_client(supabase_url, supabase_key, options=options)
+        else:
+            _supabase_client = create_client(supabase_url, supabase_key)
+        logger.info("Supabase client initialized: %s", supabase_url)
 
     return _supabase_client
 
+def _client_options():
+    """Client options with a pooled HTTP/2 httpx client, where supported.
+
+    Every discussion read and write goes through this client, so keeping
+    connections (and their TLS sessions) alive saves a handshake per query.
+    Returns None on supabase-py versions that can't take a custom client.
+    """
+    if SyncClientOptions is None or not any(
+        f.name == "httpx_client" for f in dataclasses.fields(SyncClientOptions)
+    ):
+        return None
+
+    return SyncClientOptions(
+        httpx_client=httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+            timeout=30.0,
+        )
+    )
+
 def reset_supabase_client():
     """Reset the Supabase client singleton (useful for testing)"""
     global _supabase_client
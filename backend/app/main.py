@@ -1,18 +1,72 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+import asyncio
+import logging
+import queue
+from typing import Tuple
 
 from app.core.config import get_settings
 from app.api.routes import chat_router, discussions_router, documents_router, attachments_router
-from app.services.document_service import get_document_service
-
-# Import providers to register them
-from app.providers import (
-    OpenAIProvider,
-    MistralProvider,
-    ClaudeProvider,
-    CohereProvider,
-)
+from app.providers import ProviderRegistry
+from app.services.document_service import get_document_service, shutdown_pdf_executor
+from app.utils.http_client import close_http_client, get_http_client
+from app.utils.upload_limit import UploadSizeLimitMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+def _start_log_listener(level: str) -> Tuple[QueueListener, QueueHandler]:
+    """Route application logging through a queue drained by a background thread.
+
+    Log calls on the event loop only enqueue the record; formatting and the
+    blocking write to stderr happen on the listener thread.  Returns the
+    listener and the handler installed on the root logger, so shutdown can
+    undo both.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    queue_handler = QueueHandler(log_queue)
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    # httpx/httpcore log every request and connection event at INFO/DEBUG;
+    # with a chatty root level they would flood the queue on streaming calls
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener, queue_handler
+
+
+async def _bootstrap_registry(doc_service) -> None:
+    """Populate the document registry from Pinecone in the background."""
+    try:
+        count = await doc_service.bootstrap_registry()
+        if count:
+            logger.info("Bootstrapped %d documents from Pinecone", count)
+    except Exception as e:
+        logger.warning("Document registry bootstrap failed: %s", e)
+
+
+async def _prebuild_providers(settings) -> None:
+    """Build each configured provider off the event loop after startup."""
+    # Create the shared pool here, on the loop, so the worker thread below
+    # only ever reuses it
+    get_http_client()
+    for name, (api_key, model) in settings.provider_configs.items():
+        if api_key:
+            try:
+                await asyncio.to_thread(ProviderRegistry.get_provider, name, api_key, model)
+            except Exception as e:
+                logger.warning("Could not initialise provider %s: %s", name, e)
 
 
 @asynccontextmanager
@@ -20,35 +74,45 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
     settings = get_settings()
-    print(f"Starting Qodex API server...")
-    print(f"Debug mode: {settings.debug}")
-    print(f"CORS origins: {settings.cors_origins_list}")
+    log_listener, log_handler = _start_log_listener(settings.log_level)
+    logger.info("Starting Qodex API server...")
+    logger.info("Debug mode: %s", settings.debug)
+    logger.info("CORS origins: %s", settings.cors_origins_list)
 
     # Log configured providers
-    providers_status = {
-        "OpenAI": bool(settings.openai_api_key),
-        "Mistral": bool(settings.mistral_api_key),
-        "Claude": bool(settings.anthropic_api_key),
-        "Cohere": bool(settings.cohere_api_key),
-    }
-    print(f"Configured providers: {providers_status}")
+    logger.info("Configured providers: %s", settings.providers_configured)
+
+    # Warm configured providers in the background so the first chat request
+    # doesn't pay for the SDK import, without giving up the lazy imports'
+    # fast boot
+    prebuild_task = asyncio.create_task(_prebuild_providers(settings))
 
     # Bootstrap document registry from Pinecone if the local cache is empty.
     # This ensures list_documents() and filename pre-filtering work after
     # restarts, even for documents uploaded before persistence was added.
+    # Runs in the background so startup (and /health) doesn't wait on Pinecone.
     doc_service = get_document_service()
+    bootstrap_task = None
     if not doc_service.list_documents():
-        try:
-            count = await doc_service.bootstrap_registry()
-            if count:
-                print(f"Bootstrapped {count} documents from Pinecone")
-        except Exception as e:
-            print(f"Warning: document registry bootstrap failed: {e}")
+        bootstrap_task = asyncio.create_task(_bootstrap_registry(doc_service))
 
     yield
 
     # Shutdown
-    print("Shutting down Qodex API server...")
+    logger.info("Shutting down Qodex API server...")
+    if not prebuild_task.done():
+        prebuild_task.cancel()
+    if bootstrap_task is not None and not bootstrap_task.done():
+        bootstrap_task.cancel()
+    # Provider SDK clients wrap the shared HTTP client; drop them with it so
+    # an in-process restart builds fresh ones instead of reusing a closed pool
+    ProviderRegistry.clear_instances()
+    await close_http_client()
+    shutdown_pdf_executor()
+    # Detach the queue handler so an in-process restart (--reload, tests)
+    # doesn't stack another one and duplicate every log line
+    logging.getLogger().removeHandler(log_handler)
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -57,8 +121,13 @@ app = FastAPI(
     description="AI Agent Platform API with multi-provider support",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+# Cap upload bodies before FastAPI parses (and spools) the multipart form.
+# Added before CORS so the 413 still carries the CORS headers.
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Configure CORS
 settings = get_settings()
 app.add_middleware(
@@ -92,11 +161,6 @@ async def health_check():
     settings = get_settings()
     return {
         "status": "healthy",
-        "providers": {
-            "openai": bool(settings.openai_api_key),
-            "mistral": bool(settings.mistral_api_key),
-            "claude": bool(settings.anthropic_api_key),
-            "cohere": bool(settings.cohere_api_key),
-        },
-        "pinecone": bool(settings.pinecone_api_key)
+        "providers": settings.providers_configured,
+        "pinecone": settings.pinecone_configured,
     }
@@ -1,5 +1,5 @@
 from .discussion import Discussion, DiscussionCreate, DiscussionUpdate
-from .message import Message, MessageCreate, MessageRole, DocumentSource
+from .message import Message, MessageCreate, MessageRole, DocumentSource, ROLE_VALUES
 from .document import Document, DocumentCreate
 from .attachment import Attachment, AttachmentChunk, AttachmentSummary
 
@@ -10,6 +10,7 @@ __all__ = [
     "Message",
     "MessageCreate",
     "MessageRole",
+    "ROLE_VALUES",
     "DocumentSource",
     "Document",
     "DocumentCreate",
@@ -1,16 +1,19 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal, Optional, List
 from datetime import datetime
 import uuid
 
 
 class AttachmentChunk(BaseModel):
     """A text chunk from an attached file, stored in-memory (not in Pinecone)."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     attachment_id: str
     content: str
     chunk_index: int
-    content_type: str = "paragraph"  # heading, paragraph, list
+    # Literal validation hands back the shared constant instead of a fresh str
+    content_type: Literal["heading", "paragraph", "list", "list_item"] = "paragraph"
 
 
 class Attachment(BaseModel):
@@ -19,6 +22,8 @@ class Attachment(BaseModel):
     Unlike Documents (which are indexed into Pinecone), Attachments are
     stored in-memory and used as contextual knowledge within a discussion.
     """
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     discussion_id: str
     filename: str
@@ -29,12 +34,11 @@ class Attachment(BaseModel):
     chunks: List[AttachmentChunk] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        from_attributes = True
-
 
 class AttachmentSummary(BaseModel):
     """Lightweight attachment info returned in list responses (no full text/chunks)."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     id: str
     discussion_id: str
     filename: str
@@ -45,7 +49,8 @@ class AttachmentSummary(BaseModel):
 
     @classmethod
     def from_attachment(cls, attachment: Attachment) -> "AttachmentSummary":
-        return cls(
+        # Fields come from an already-validated Attachment; skip re-validation
+        return cls.model_construct(
             id=attachment.id,
             discussion_id=attachment.discussion_id,
             filename=attachment.filename,
@@ -1,10 +1,27 @@
-"""AI Provider implementations for multi-model support."""
+"""AI Provider implementations for multi-model support.
+
+Provider modules pull in heavy SDKs, so they are imported on first access
+(PEP 562) rather than with the package.  ProviderRegistry resolves them the
+same way on first use.
+"""
+
+import importlib
 
 from .base import BaseProvider, ProviderRegistry
-from .openai_provider import OpenAIProvider
-from .mistral_provider import MistralProvider
-from .claude_provider import ClaudeProvider
-from .cohere_provider import CohereProvider
+
+_LAZY_PROVIDERS = {
+    "OpenAIProvider": ".openai_provider",
+    "MistralProvider": ".mistral_provider",
+    "ClaudeProvider": ".claude_provider",
+    "CohereProvider": ".cohere_provider",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_PROVIDERS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
 
 __all__ = [
     "BaseProvider",
@@ -1,6 +1,97 @@
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, Dict, List, Optional, Type
-from app.models.message import Message
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Type
+from functools import lru_cache
+import asyncio
+import hashlib
+import importlib
+import re
+import threading
+
+import orjson
+
+from app.models.message import Message, ROLE_VALUES
+
+# Markdown code fence some models wrap their JSON output in
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+
+# Exact-match cache of completed responses, replayed for repeat requests.
+# Only near-deterministic (low temperature) requests are cached; anything
+# sampled hotter is expected to vary between calls.
+_RESPONSE_CACHE_MAX = 256
+_RESPONSE_CACHE_MAX_TEMPERATURE = 0.2
+_REPLAY_CHUNK_SIZE = 64
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+
+# System prompt boilerplate, split around the context slot.  Built once at
+# import so each request only does a single join with the variable parts.
+_PINECONE_PREFIX = (
+    "Use the following context to help answer the user's question. "
+    "Each source is numbered. When you reference information from a specific source, "
+    "add a citation marker [N] immediately after the relevant statement, where N is the source number.\n\n"
+    "[Sources for reference]\n"
+)
+_PINECONE_SUFFIX = (
+    "\n\n"
+    "Guidelines:\n"
+    "- ONLY use citation numbers that match the [Source N] headers listed above\n"
+    "- Do NOT invent citation numbers or use reference/footnote numbers from inside the source text\n"
+    "- Add [N] citations inline where information comes from source N\n"
+    "- Multiple sources can be cited together like [1][2]\n"
+    "- Be precise - cite at the claim level, not just at the end of paragraphs\n"
+    "- Natural placement - citations should feel unobtrusive\n\n"
+    "CRITICAL — Entity verification & source isolation:\n"
+    "- Before answering, check: does the user's question reference a specific person, course, or entity?\n"
+    "- If YES: verify that at least one source ACTUALLY MENTIONS that person/entity by name\n"
+    "- If NO source mentions the specific person/entity the user asked about, you MUST say so clearly — "
+    "do NOT construct an answer by inferring from unrelated sources\n"
+    "- Do NOT say 'while not directly mentioned, we can infer...' — that IS hallucination\n"
+    "- ONLY use sources that explicitly contain information about the queried topic\n"
+    "- The conversation history that follows is for continuity only\n"
+    "- Do NOT reuse specific facts, names, affiliations, or claims from your earlier responses — "
+    "they came from different source documents that may not apply to this question\n"
+    "- Base ALL factual statements on the current sources listed above\n\n"
+    "Now provide an accurate and helpful response with inline citations."
+)
+
+# Attachment-only mode: no numbered citations, reference files by name
+_ATTACHMENT_PREFIX = (
+    "The user has attached documents to this conversation for you to analyze. "
+    "Use the content below to answer their question.\n\n"
+    "[Attached Documents]\n"
+)
+_ATTACHMENT_SUFFIX = (
+    "\n\n"
+    "Guidelines:\n"
+    "- Reference documents by their filename when discussing specific content\n"
+    "- Provide thorough, accurate analysis grounded in the attached content\n"
+    "- Do NOT use numbered citation markers like [1] or [2]\n"
+    "- If the documents don't contain enough information to answer, say so explicitly\n"
+    "- Do NOT carry forward specific facts from your earlier responses — "
+    "base all claims on the attached content above\n\n"
+    "Now provide a helpful response based on the attached documents."
+)
+
+
+# Contexts can run to tens of KB, and each entry holds both the key and the
+# built prompt, so keep the cache small. Retries and multi-provider fan-out
+# of the same turn are the hits this is for.
+@lru_cache(maxsize=64)
+def _build_system_content(
+    context: str,
+    intent_prompt: Optional[str],
+    research_prompt: Optional[str],
+    context_mode: str,
+) -> str:
+    """Assemble the system prompt around the given context."""
+    if context_mode == "pinecone":
+        prefix, suffix = _PINECONE_PREFIX, _PINECONE_SUFFIX
+    else:
+        prefix, suffix = _ATTACHMENT_PREFIX, _ATTACHMENT_SUFFIX
+
+    # Research depth instructions (controls thoroughness) and
+    # intent-specific output structure follow the boilerplate.
+    return f"{prefix}{context}{suffix}{research_prompt or ''}{intent_prompt or ''}"
 
 
 class BaseProvider(ABC):
@@ -25,6 +116,7 @@ class BaseProvider(ABC):
         max_tokens: int = 4096,
         intent_prompt: Optional[str] = None,
         research_prompt: Optional[str] = None,
+        context_mode: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
         """
         Stream a completion response.
@@ -36,6 +128,8 @@ class BaseProvider(ABC):
             max_tokens: Maximum tokens to generate
             intent_prompt: Optional intent-specific prompt suffix to append to system message
             research_prompt: Optional research depth prompt to control response thoroughness
+            context_mode: "pinecone" if context holds numbered knowledge-base sources,
+                "attachment" if it only holds attached files; None to detect it
 
         Yields:
             String chunks of the response
@@ -62,87 +156,108 @@ class BaseProvider(ABC):
         """
         pass
 
+    @staticmethod
+    def _parse_suggested_questions(content: str, count: int) -> List[str]:
+        """Parse a model reply holding a JSON array of questions.
+
+        Strips a surrounding markdown code fence if present.  Raises on
+        malformed JSON so callers can log the failure.
+        """
+        questions = orjson.loads(_FENCE_RE.sub("", content).strip())
+
+        # Validate and limit
+        if isinstance(questions, list):
+            return [q for q in questions if isinstance(q, str)][:count]
+
+        return []
+
+    async def _cached_stream(
+        self,
+        request: Any,
+        temperature: float,
+        upstream: AsyncIterator[str],
+    ) -> AsyncGenerator[str, None]:
+        """Stream `upstream`, or replay a cached response for an identical request.
+
+        `request` is the provider-formatted payload (messages, limits) and
+        must be JSON-serializable; together with provider, model and
+        temperature it keys the cache.  Only responses streamed to completion
+        are stored.
+        """
+        if temperature >= _RESPONSE_CACHE_MAX_TEMPERATURE:
+            async for text in upstream:
+                yield text
+            return
+
+        key = hashlib.blake2b(
+            orjson.dumps((self.provider_name, self.model, temperature, request)),
+            digest_size=16,
+        ).hexdigest()
+
+        cached = _response_cache.get(key)
+        if cached is not None:
+            _response_cache.move_to_end(key)
+            for i in range(0, len(cached), _REPLAY_CHUNK_SIZE):
+                yield cached[i:i + _REPLAY_CHUNK_SIZE]
+                await asyncio.sleep(0)  # keep the replay interleaved like a real stream
+            return
+
+        parts = []
+        async for text in upstream:
+            parts.append(text)
+            yield text
+
+        _response_cache[key] = "".join(parts)
+        if len(_response_cache) > _RESPONSE_CACHE_MAX:
+            _response_cache.popitem(last=False)
+
+    def _build_system_prompt(
+        self,
+        context: Optional[str],
+        intent_prompt: Optional[str] = None,
+        research_prompt: Optional[str] = None,
+        context_mode: Optional[str] = None,
+    ) -> Optional[str]:
+        """Build the system prompt for a turn, or None when there is no context.
+
+        Providers whose APIs take the system prompt separately from the
+        message list call this directly; override it to customise the prompt.
+        """
+        if not context:
+            return None
+
+        # The caller normally knows whether context includes Pinecone sources
+        # or only user attachments.  Otherwise detect it from the labels:
+        # attachment-only context uses [Attached File: ...] labels;
+        # Pinecone sources use [Source N - ...] labels.
+        if context_mode is None:
+            context_mode = "pinecone" if "[Source " in context else "attachment"
+
+        return _build_system_content(context, intent_prompt, research_prompt, context_mode)
+
     def _format_messages_for_api(
         self,
         messages: List[Message],
         context: Optional[str] = None,
         intent_prompt: Optional[str] = None,
         research_prompt: Optional[str] = None,
+        context_mode: Optional[str] = None,
     ) -> List[Dict[str, str]]:
         """Format messages for the API, optionally including context with citation instructions."""
-        formatted = []
-
-        # Add system message with context if provided
-        if context:
-            # Detect whether context includes Pinecone sources or only user attachments.
-            # Attachment-only context uses [Attached File: ...] labels;
-            # Pinecone sources use [Source N - ...] labels.
-            has_pinecone_sources = "[Source " in context
-
-            if has_pinecone_sources:
-                system_content = (
-                    "Use the following context to help answer the user's question. "
-                    "Each source is numbered. When you reference information from a specific source, "
-                    "add a citation marker [N] immediately after the relevant statement, where N is the source number.\n\n"
-                    "[Sources for reference]\n"
-                    f"{context}\n\n"
-                    "Guidelines:\n"
-                    "- ONLY use citation numbers that match the [Source N] headers listed above\n"
-                    "- Do NOT invent citation numbers or use reference/footnote numbers from inside the source text\n"
-                    "- Add [N] citations inline where information comes from source N\n"
-                    "- Multiple sources can be cited together like [1][2]\n"
-                    "- Be precise - cite at the claim level, not just at the end of paragraphs\n"
-                    "- Natural placement - citations should feel unobtrusive\n\n"
-                    "CRITICAL — Entity verification & source isolation:\n"
-                    "- Before answering, check: does the user's question reference a specific person, course, or entity?\n"
-                    "- If YES: verify that at least one source ACTUALLY MENTIONS that person/entity by name\n"
-                    "- If NO source mentions the specific person/entity the user asked about, you MUST say so clearly — "
-                    "do NOT construct an answer by inferring from unrelated sources\n"
-                    "- Do NOT say 'while not directly mentioned, we can infer...' — that IS hallucination\n"
-                    "- ONLY use sources that explicitly contain information about the queried topic\n"
-                    "- The conversation history that follows is for continuity only\n"
-                    "- Do NOT reuse specific facts, names, affiliations, or claims from your earlier responses — "
-                    "they came from different source documents that may not apply to this question\n"
-                    "- Base ALL factual statements on the current sources listed above\n\n"
-                    "Now provide an accurate and helpful response with inline citations."
-                )
-            else:
-                # Attachment-only mode: no numbered citations, reference files by name
-                system_content = (
-                    "The user has attached documents to this conversation for you to analyze. "
-                    "Use the content below to answer their question.\n\n"
-                    "[Attached Documents]\n"
-                    f"{context}\n\n"
-                    "Guidelines:\n"
-                    "- Reference documents by their filename when discussing specific content\n"
-                    "- Provide thorough, accurate analysis grounded in the attached content\n"
-                    "- Do NOT use numbered citation markers like [1] or [2]\n"
-                    "- If the documents don't contain enough information to answer, say so explicitly\n"
-                    "- Do NOT carry forward specific facts from your earlier responses — "
-                    "base all claims on the attached content above\n\n"
-                    "Now provide a helpful response based on the attached documents."
-                )
-
-            # Append research depth instructions (controls thoroughness)
-            if research_prompt:
-                system_content += research_prompt
-
-            # Append intent-specific output structure if present
-            if intent_prompt:
-                system_content += intent_prompt
-
-            formatted.append({
-                "role": "system",
-                "content": system_content
-            })
-
-        # Add conversation messages (filter out empty messages)
-        for msg in messages:
-            if msg.content and msg.content.strip():
-                formatted.append({
-                    "role": msg.role.value,
-                    "content": msg.content
-                })
+        # Conversation messages, filtering out empty ones.
+        # isspace() tests in place, where strip() would copy every message.
+        formatted = [
+            {"role": ROLE_VALUES[msg.role], "content": msg.content}
+            for msg in messages
+            if msg.content and not msg.content.isspace()
+        ]
+
+        # Lead with a system message carrying the context, if provided
+        system_content = self._build_system_prompt(
+            context, intent_prompt, research_prompt, context_mode
+        )
+        if system_content:
+            return [{"role": "system", "content": system_content}, *formatted]
 
         return formatted
 
@@ -152,31 +267,61 @@ class ProviderRegistry:
 
     _providers: Dict[str, Type[BaseProvider]] = {}
     _instances: Dict[str, BaseProvider] = {}
+    # Serialises first-time construction only; cache hits never take it
+    _lock = threading.Lock()
+
+    # Built-in providers; each module registers itself when first imported
+    _builtin_modules: Dict[str, str] = {
+        "openai": "app.providers.openai_provider",
+        "mistral": "app.providers.mistral_provider",
+        "claude": "app.providers.claude_provider",
+        "cohere": "app.providers.cohere_provider",
+    }
 
     @classmethod
     def register(cls, name: str, provider_class: Type[BaseProvider]) -> None:
         """Register a provider class."""
         cls._providers[name.lower()] = provider_class
 
+    @classmethod
+    def _resolve(cls, name: str) -> Optional[Type[BaseProvider]]:
+        """Look up a provider class, importing its built-in module on first use."""
+        key = name.lower()
+        provider_class = cls._providers.get(key)
+        if provider_class is None and key in cls._builtin_modules:
+            importlib.import_module(cls._builtin_modules[key])
+            provider_class = cls._providers.get(key)
+        return provider_class
+
     @classmethod
     def get_provider(
         cls, name: str, api_key: str, model: str
     ) -> BaseProvider:
-        """Get or create a provider instance."""
+        """Get or create a provider instance.
+
+        Construction is double-checked under a lock so concurrent first
+        callers (e.g. from worker threads) never build duplicate SDK clients.
+        """
         cache_key = f"{name}:{model}"
 
-        if cache_key not in cls._instances:
-            provider_class = cls._providers.get(name.lower())
-            if not provider_class:
-                raise ValueError(f"Unknown provider: {name}")
-            cls._instances[cache_key] = provider_class(api_key, model)
+        try:
+            return cls._instances[cache_key]
+        except KeyError:
+            pass
 
-        return cls._instances[cache_key]
+        with cls._lock:
+            instance = cls._instances.get(cache_key)
+            if instance is None:
+                provider_class = cls._resolve(name)
+                if not provider_class:
+                    raise ValueError(f"Unknown provider: {name}")
+                instance = cls._instances.setdefault(cache_key, provider_class(api_key, model))
+        return instance
 
     @classmethod
     def list_providers(cls) -> List[str]:
         """List all registered provider names."""
-        return list(cls._providers.keys())
+        return list(dict.fromkeys([*cls._builtin_modules, *cls._providers]))
 
     @classmethod
     def clear_instances(cls) -> None:
@@ -1,17 +1,20 @@
 from typing import AsyncGenerator, List, Optional, Dict
+import logging
 from anthropic import AsyncAnthropic
-import json
 
-from app.models.message import Message
+from app.models.message import Message, MessageRole, ROLE_VALUES
+from app.utils.http_client import get_http_client
 from .base import BaseProvider, ProviderRegistry
 
+logger = logging.getLogger(__name__)
+
 
 class ClaudeProvider(BaseProvider):
     """Anthropic Claude API provider implementation."""
 
     def __init__(self, api_key: str, model: str = "claude-sonnet-4-5-20250929"):
         super().__init__(api_key, model)
-        self.client = AsyncAnthropic(api_key=api_key)
+        self.client = AsyncAnthropic(api_key=api_key, http_client=get_http_client())
 
     @property
     def provider_name(self) -> str:
@@ -25,69 +28,56 @@ class ClaudeProvider(BaseProvider):
         max_tokens: int = 4096,
         intent_prompt: Optional[str] = None,
         research_prompt: Optional[str] = None,
+        context_mode: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
         """Stream completion from Claude."""
         # Claude uses a different message format
-        system_message = None
+        system_message = self._build_system_prompt(
+            context, intent_prompt, research_prompt, context_mode
+        )
         formatted_messages = []
 
-        if context:
-            system_message = (
-                "Use the following context to help answer the user's question. "
-                "Each source is numbered. When you reference information from a specific source, "
-                "add a citation marker [N] immediately after the relevant statement, where N is the source number.\n\n"
-                "[Sources for reference]\n"
-                f"{context}\n\n"
-                "Guidelines:\n"
-                "- Add [N] citations inline where information comes from source N\n"
-                "- Multiple sources can be cited together like [1][2]\n"
-                "- Be precise - cite at the claim level, not just at the end of paragraphs\n"
-                "- Natural placement - citations should feel unobtrusive\n\n"
-                "CRITICAL — Entity verification:\n"
-                "- Before answering, check: does the user's question reference a specific person, course, or entity?\n"
-                "- If YES: verify that at least one source ACTUALLY MENTIONS that person/entity by name\n"
-                "- If NO source mentions the specific person/entity the user asked about, you MUST say so clearly — "
-                "do NOT construct an answer by inferring from unrelated sources\n"
-                "- Do NOT say 'while not directly mentioned, we can infer...' — that IS hallucination\n"
-                "- ONLY use sources that explicitly contain information about the queried topic\n"
-                "- Do NOT reuse specific facts from earlier responses — they came from different sources\n"
-                "- Base ALL factual statements on the current sources listed above\n\n"
-                "Now provide an accurate and helpful response with inline citations."
-            )
-
-            # Append research depth instructions (controls thoroughness)
-            if research_prompt:
-                system_message += research_prompt
-
-            # Append intent-specific output structure if present
-            if intent_prompt:
-                system_message += intent_prompt
-
         for msg in messages:
+            content = msg.content
             # Skip empty messages
-            if not msg.content or not msg.content.strip():
+            if not content or content.isspace():
                 continue
 
-            if msg.role.value == "system":
+            role = msg.role
+            if role is MessageRole.SYSTEM:
                 # Combine system messages
                 if system_message:
-                    system_message = f"{system_message}\n\n{msg.content}"
+                    system_message = f"{system_message}\n\n{content}"
                 else:
-                    system_message = msg.content
+                    system_message = content
             else:
                 formatted_messages.append({
-                    "role": msg.role.value,
-                    "content": msg.content
+                    "role": ROLE_VALUES[role],
+                    "content": content
                 })
 
         # Ensure we have at least one user message
         if not formatted_messages:
             formatted_messages = [{"role": "user", "content": "Hello"}]
 
+        system_message = system_message or ""
+        upstream = self._stream(system_message, formatted_messages, max_tokens)
+        async for text in self._cached_stream(
+            (system_message, formatted_messages, max_tokens), temperature, upstream
+        ):
+            yield text
+
+    async def _stream(
+        self,
+        system_message: str,
+        formatted_messages: List[Dict[str, str]],
+        max_tokens: int,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a completion from the Anthropic Messages API."""
         async with self.client.messages.stream(
             model=self.model,
             max_tokens=max_tokens,
-            system=system_message or "",
+            system=system_message,
             messages=formatted_messages,
         ) as stream:
             async for text in stream.text_stream:
@@ -126,23 +116,10 @@ Guidelines:
                 max_tokens=200
             )
 
-            content = response.content[0].text.strip()
-
-            # Try to extract JSON array from response
-            if content.startswith('```'):
-                lines = content.split('\n')
-                content = '\n'.join(lines[1:-1]) if len(lines) > 2 else content
-                content = content.replace('```json', '').replace('```', '').strip()
-
-            questions = json.loads(content)
-
-            if isinstance(questions, list):
-                return [q for q in questions if isinstance(q, str)][:count]
-
-            return []
+            return self._parse_suggested_questions(response.content[0].text, count)
 
         except Exception as e:
-            print(f"Failed to generate suggested questions (Claude): {e}")
+            logger.warning("Failed to generate suggested questions (Claude): %s", e)
             return []
 
 
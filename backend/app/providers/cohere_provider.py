@@ -1,17 +1,67 @@
 from typing import AsyncGenerator, List, Optional, Dict
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import logging
 import cohere
-import json
+import orjson
 
 from app.models.message import Message
+from app.utils.http_client import get_http_client
 from .base import BaseProvider, ProviderRegistry
 
+logger = logging.getLogger(__name__)
+
+# Suggested questions for recently seen turns (regenerate clicks, repeated
+# questions), keyed on a hash of everything that goes into the prompt
+_SUGGESTION_CACHE_MAX = 512
+_suggestion_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
+# Constrain suggested-question replies to a well-formed JSON object so they
+# never arrive wrapped in markdown or with trailing prose.
+_SUGGESTED_QUESTIONS_FORMAT = {
+    "type": "json_object",
+    "json_schema": {
+        "type": "object",
+        "properties": {
+            "questions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["questions"],
+    },
+}
+
+# Fixed arguments for the suggested-questions chat call
+_SUGGESTED_QUESTIONS_KWARGS = {
+    "model": "command-a-03-2025",  # Flagship model
+    "temperature": 0.7,
+    "max_tokens": 200,
+    "response_format": _SUGGESTED_QUESTIONS_FORMAT,
+}
+
+_SUGGESTED_QUESTIONS_TEMPLATE = """Based on this conversation, suggest {count} relevant follow-up questions the user might ask.
+
+Return a JSON object with a "questions" array of question strings.
+Example: {{"questions": ["Question 1?", "Question 2?", "Question 3?"]}}
+
+Guidelines:
+- Questions should be natural and conversational
+- Focus on clarifying details, exploring related topics, or going deeper
+- Keep questions concise (under 15 words)
+- Make them specific to the conversation context"""
+
+
+@lru_cache(maxsize=8)
+def _suggested_questions_prompt(count: int) -> str:
+    """System prompt for suggested questions; only `count` varies."""
+    return _SUGGESTED_QUESTIONS_TEMPLATE.format(count=count)
+
 
 class CohereProvider(BaseProvider):
     """Cohere API provider implementation using V2 API."""
 
     def __init__(self, api_key: str, model: str = "command-a-03-2025"):
         super().__init__(api_key, model)
-        self.client = cohere.AsyncClientV2(api_key=api_key)
+        self.client = cohere.AsyncClientV2(api_key=api_key, httpx_client=get_http_client())
 
     @property
     def provider_name(self) -> str:
@@ -25,68 +75,40 @@ class CohereProvider(BaseProvider):
         max_tokens: int = 4096,
         intent_prompt: Optional[str] = None,
         research_prompt: Optional[str] = None,
+        context_mode: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
         """Stream completion from Cohere V2 API."""
-        formatted_messages = []
-
-        # Add system message with context if provided
-        if context:
-            system_content = (
-                "Use the following context to help answer the user's question. "
-                "Each source is numbered. When you reference information from a specific source, "
-                "add a citation marker [N] immediately after the relevant statement, where N is the source number.\n\n"
-                "[Sources for reference]\n"
-                f"{context}\n\n"
-                "Guidelines:\n"
-                "- Add [N] citations inline where information comes from source N\n"
-                "- Multiple sources can be cited together like [1][2]\n"
-                "- Be precise - cite at the claim level, not just at the end of paragraphs\n"
-                "- Natural placement - citations should feel unobtrusive\n\n"
-                "CRITICAL — Entity verification:\n"
-                "- Before answering, check: does the user's question reference a specific person, course, or entity?\n"
-                "- If YES: verify that at least one source ACTUALLY MENTIONS that person/entity by name\n"
-                "- If NO source mentions the specific person/entity the user asked about, you MUST say so clearly — "
-                "do NOT construct an answer by inferring from unrelated sources\n"
-                "- Do NOT say 'while not directly mentioned, we can infer...' — that IS hallucination\n"
-                "- ONLY use sources that explicitly contain information about the queried topic\n"
-                "- Do NOT reuse specific facts from earlier responses — they came from different sources\n"
-                "- Base ALL factual statements on the current sources listed above\n\n"
-                "Now provide an accurate and helpful response with inline citations."
-            )
-
-            # Append research depth instructions (controls thoroughness)
-            if research_prompt:
-                system_content += research_prompt
-
-            # Append intent-specific output structure if present
-            if intent_prompt:
-                system_content += intent_prompt
+        formatted_messages = self._format_messages_for_api(
+            messages, context, intent_prompt, research_prompt, context_mode
+        )
 
-            formatted_messages.append({
-                "role": "system",
-                "content": system_content
-            })
-
-        # Add conversation messages (filter out empty messages)
-        for msg in messages:
-            if msg.content and msg.content.strip():
-                formatted_messages.append({
-                    "role": msg.role.value,
-                    "content": msg.content
-                })
+        upstream = self._stream(formatted_messages, temperature, max_tokens)
+        async for text in self._cached_stream(
+            (formatted_messages, max_tokens), temperature, upstream
+        ):
+            yield text
 
+    async def _stream(
+        self,
+        formatted_messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a completion from the Cohere V2 API."""
         async for event in self.client.chat_stream(
             model=self.model,
             messages=formatted_messages,
             temperature=temperature,
             max_tokens=max_tokens,
         ):
-            if hasattr(event, 'delta') and hasattr(event.delta, 'message'):
-                if hasattr(event.delta.message, 'content') and event.delta.message.content:
-                    if hasattr(event.delta.message.content, 'text'):
-                        text = event.delta.message.content.text
-                        if text:
-                            yield text
+            # Only content-delta events carry text; the others (message-start,
+            # content-end, ...) lack part of the chain or have it set to None.
+            try:
+                text = event.delta.message.content.text
+            except AttributeError:
+                continue
+            if text:
+                yield text
 
     async def generate_suggested_questions(
         self,
@@ -95,49 +117,38 @@ class CohereProvider(BaseProvider):
         count: int = 5
     ) -> List[str]:
         """Generate suggested follow-up questions using Cohere."""
-        try:
-            system_prompt = f"""Based on this conversation, suggest {count} relevant follow-up questions the user might ask.
-
-Return ONLY a JSON array of question strings, nothing else.
-Example: ["Question 1?", "Question 2?", "Question 3?"]
-
-Guidelines:
-- Questions should be natural and conversational
-- Focus on clarifying details, exploring related topics, or going deeper
-- Keep questions concise (under 15 words)
-- Make them specific to the conversation context"""
+        history = conversation_history[-6:]  # Last 6 messages for context
+        cache_key = hashlib.blake2b(
+            orjson.dumps([count, last_response, history]),
+            digest_size=16,
+        ).hexdigest()
+        cached = _suggestion_cache.get(cache_key)
+        if cached is not None:
+            _suggestion_cache.move_to_end(cache_key)
+            return list(cached)
 
+        try:
             messages = [
-                {"role": "system", "content": system_prompt},
-                *conversation_history[-6:],
+                {"role": "system", "content": _suggested_questions_prompt(count)},
+                *history,
                 {"role": "assistant", "content": last_response},
                 {"role": "user", "content": "Generate suggested follow-up questions."}
             ]
 
             response = await self.client.chat(
-                model="command-a-03-2025",  # Flagship model
-                messages=messages,
-                temperature=0.7,
-                max_tokens=200
+                messages=messages, **_SUGGESTED_QUESTIONS_KWARGS
             )
 
-            content = response.message.content[0].text.strip()
-
-            # Try to extract JSON array from response
-            if content.startswith('```'):
-                lines = content.split('\n')
-                content = '\n'.join(lines[1:-1]) if len(lines) > 2 else content
-                content = content.replace('```json', '').replace('```', '').strip()
-
-            questions = json.loads(content)
-
-            if isinstance(questions, list):
-                return [q for q in questions if isinstance(q, str)][:count]
-
-            return []
+            # The JSON schema guarantees a list of strings under "questions"
+            questions = orjson.loads(response.message.content[0].text)["questions"][:count]
+            if questions:
+                _suggestion_cache[cache_key] = questions
+                if len(_suggestion_cache) > _SUGGESTION_CACHE_MAX:
+                    _suggestion_cache.popitem(last=False)
+            return questions
 
         except Exception as e:
-            print(f"Failed to generate suggested questions (Cohere): {e}")
+            logger.warning("Failed to generate suggested questions (Cohere): %s", e)
             return []
 
 
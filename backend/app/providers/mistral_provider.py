@@ -1,17 +1,21 @@
 from typing import AsyncGenerator, List, Optional, Dict
+import logging
+import orjson
 from mistralai import Mistral
-import json
 
 from app.models.message import Message
+from app.utils.http_client import get_http_client
 from .base import BaseProvider, ProviderRegistry
 
+logger = logging.getLogger(__name__)
+
 
 class MistralProvider(BaseProvider):
     """Mistral AI API provider implementation."""
 
     def __init__(self, api_key: str, model: str = "mistral-large-latest"):
         super().__init__(api_key, model)
-        self.client = Mistral(api_key=api_key)
+        self.client = Mistral(api_key=api_key, async_client=get_http_client())
 
     @property
     def provider_name(self) -> str:
@@ -25,56 +29,26 @@ class MistralProvider(BaseProvider):
         max_tokens: int = 4096,
         intent_prompt: Optional[str] = None,
         research_prompt: Optional[str] = None,
+        context_mode: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
         """Stream completion from Mistral."""
-        formatted_messages = []
-
-        # Add system message with context if provided
-        if context:
-            system_content = (
-                "Use the following context to help answer the user's question. "
-                "Each source is numbered. When you reference information from a specific source, "
-                "add a citation marker [N] immediately after the relevant statement, where N is the source number.\n\n"
-                "[Sources for reference]\n"
-                f"{context}\n\n"
-                "Guidelines:\n"
-                "- Add [N] citations inline where information comes from source N\n"
-                "- Multiple sources can be cited together like [1][2]\n"
-                "- Be precise - cite at the claim level, not just at the end of paragraphs\n"
-                "- Natural placement - citations should feel unobtrusive\n\n"
-                "CRITICAL — Entity verification:\n"
-                "- Before answering, check: does the user's question reference a specific person, course, or entity?\n"
-                "- If YES: verify that at least one source ACTUALLY MENTIONS that person/entity by name\n"
-                "- If NO source mentions the specific person/entity the user asked about, you MUST say so clearly — "
-                "do NOT construct an answer by inferring from unrelated sources\n"
-                "- Do NOT say 'while not directly mentioned, we can infer...' — that IS hallucination\n"
-                "- ONLY use sources that explicitly contain information about the queried topic\n"
-                "- Do NOT reuse specific facts from earlier responses — they came from different sources\n"
-                "- Base ALL factual statements on the current sources listed above\n\n"
-                "Now provide an accurate and helpful response with inline citations."
-            )
-
-            # Append research depth instructions (controls thoroughness)
-            if research_prompt:
-                system_content += research_prompt
-
-            # Append intent-specific output structure if present
-            if intent_prompt:
-                system_content += intent_prompt
-
-            formatted_messages.append({
-                "role": "system",
-                "content": system_content
-            })
+        formatted_messages = self._format_messages_for_api(
+            messages, context, intent_prompt, research_prompt, context_mode
+        )
 
-        # Add conversation messages (filter out empty messages)
-        for msg in messages:
-            if msg.content and msg.content.strip():
-                formatted_messages.append({
-                    "role": msg.role.value,
-                    "content": msg.content
-                })
+        upstream = self._stream(formatted_messages, temperature, max_tokens)
+        async for text in self._cached_stream(
+            (formatted_messages, max_tokens), temperature, upstream
+        ):
+            yield text
 
+    async def _stream(
+        self,
+        formatted_messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a completion from the Mistral API."""
         async_response = await self.client.chat.stream_async(
             model=self.model,
             messages=formatted_messages,
@@ -83,8 +57,12 @@ class MistralProvider(BaseProvider):
         )
 
         async for chunk in async_response:
-            if chunk.data.choices and chunk.data.choices[0].delta.content:
-                yield chunk.data.choices[0].delta.content
+            # Walk the attribute chain once per token
+            choices = chunk.data.choices
+            if choices:
+                content = choices[0].delta.content
+                if content:
+                    yield content
 
     async def generate_suggested_questions(
         self,
@@ -96,8 +74,8 @@ class MistralProvider(BaseProvider):
         try:
             system_prompt = f"""Based on this conversation, suggest {count} relevant follow-up questions the user might ask.
 
-Return ONLY a JSON array of question strings, nothing else.
-Example: ["Question 1?", "Question 2?", "Question 3?"]
+Return a JSON object with a "questions" array of question strings.
+Example: {{"questions": ["Question 1?", "Question 2?", "Question 3?"]}}
 
 Guidelines:
 - Questions should be natural and conversational
@@ -116,26 +94,18 @@ Guidelines:
                 model="mistral-small-latest",  # Fast model
                 messages=messages,
                 temperature=0.7,
-                max_tokens=200
+                max_tokens=200,
+                response_format={"type": "json_object"},
             )
 
-            content = response.choices[0].message.content.strip()
-
-            # Try to extract JSON array from response
-            if content.startswith('```'):
-                lines = content.split('\n')
-                content = '\n'.join(lines[1:-1]) if len(lines) > 2 else content
-                content = content.replace('```json', '').replace('```', '').strip()
-
-            questions = json.loads(content)
-
-            if isinstance(questions, list):
-                return [q for q in questions if isinstance(q, str)][:count]
-
-            return []
+            # JSON mode guarantees a bare JSON object, no code fence to strip
+            payload = orjson.loads(response.choices[0].message.content)
+            return [
+                q for q in payload.get("questions", []) if isinstance(q, str)
+            ][:count]
 
         except Exception as e:
-            print(f"Failed to generate suggested questions (Mistral): {e}")
+            logger.warning("Failed to generate suggested questions (Mistral): %s", e)
             return []
 
 
@@ -1,17 +1,29 @@
 from typing import AsyncGenerator, List, Optional, Dict
+from collections import OrderedDict
+import hashlib
+import logging
+
+import orjson
 from openai import AsyncOpenAI
-import json
 
 from app.models.message import Message
+from app.utils.http_client import get_http_client
 from .base import BaseProvider, ProviderRegistry
 
+logger = logging.getLogger(__name__)
+
+# Suggested questions for recently seen turns (regenerate clicks, repeated
+# questions), keyed on a hash of everything that goes into the prompt
+_SUGGESTION_CACHE_MAX = 512
+_suggestion_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
 
 class OpenAIProvider(BaseProvider):
     """OpenAI API provider implementation."""
 
     def __init__(self, api_key: str, model: str = "gpt-4.1"):
         super().__init__(api_key, model)
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key, http_client=get_http_client())
 
     @property
     def provider_name(self) -> str:
@@ -25,10 +37,26 @@ class OpenAIProvider(BaseProvider):
         max_tokens: int = 4096,
         intent_prompt: Optional[str] = None,
         research_prompt: Optional[str] = None,
+        context_mode: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
         """Stream completion from OpenAI."""
-        formatted_messages = self._format_messages_for_api(messages, context, intent_prompt, research_prompt)
+        formatted_messages = self._format_messages_for_api(
+            messages, context, intent_prompt, research_prompt, context_mode
+        )
 
+        upstream = self._stream(formatted_messages, temperature, max_tokens)
+        async for text in self._cached_stream(
+            (formatted_messages, max_tokens), temperature, upstream
+        ):
+            yield text
+
+    async def _stream(
+        self,
+        formatted_messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> AsyncGenerator[str, None]:
+        """Stream a completion from the OpenAI API."""
         stream = await self.client.chat.completions.create(
             model=self.model,
             messages=formatted_messages,
@@ -38,8 +66,12 @@ class OpenAIProvider(BaseProvider):
         )
 
         async for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+            # Walk the attribute chain once per token
+            choices = chunk.choices
+            if choices:
+                content = choices[0].delta.content
+                if content:
+                    yield content
 
     async def generate_suggested_questions(
         self,
@@ -48,12 +80,22 @@ class OpenAIProvider(BaseProvider):
         count: int = 5
     ) -> List[str]:
         """Generate suggested follow-up questions using OpenAI."""
+        history = conversation_history[-6:]  # Last 6 messages for context
+        cache_key = hashlib.blake2b(
+            orjson.dumps([self.model, count, last_response, history]),
+            digest_size=16,
+        ).hexdigest()
+        cached = _suggestion_cache.get(cache_key)
+        if cached is not None:
+            _suggestion_cache.move_to_end(cache_key)
+            return list(cached)
+
         try:
             # Build context-aware prompt
             system_prompt = f"""Based on this conversation, suggest {count} relevant follow-up questions the user might ask.
 
-Return ONLY a JSON array of question strings, nothing else.
-Example: ["Question 1?", "Question 2?", "Question 3?"]
+Return a JSON object with a "questions" array of question strings.
+Example: {{"questions": ["Question 1?", "Question 2?", "Question 3?"]}}
 
 Guidelines:
 - Questions should be natural and conversational
@@ -63,7 +105,7 @@ Guidelines:
 
             messages = [
                 {"role": "system", "content": system_prompt},
-                *conversation_history[-6:],  # Last 6 messages for context
+                *history,
                 {"role": "assistant", "content": last_response},
                 {"role": "user", "content": "Generate suggested follow-up questions."}
             ]
@@ -72,30 +114,23 @@ Guidelines:
                 model="gpt-4.1-mini",  # Fast, cheap model for question generation
                 messages=messages,
                 temperature=0.7,
-                max_tokens=200
+                max_tokens=200,
+                response_format={"type": "json_object"},
             )
 
-            # Parse JSON response
-            content = response.choices[0].message.content.strip()
-
-            # Try to extract JSON array from response
-            # Sometimes models wrap JSON in markdown code blocks
-            if content.startswith('```'):
-                # Extract from code block
-                lines = content.split('\n')
-                content = '\n'.join(lines[1:-1]) if len(lines) > 2 else content
-                content = content.replace('```json', '').replace('```', '').strip()
-
-            questions = json.loads(content)
-
-            # Validate and limit
-            if isinstance(questions, list):
-                return [q for q in questions if isinstance(q, str)][:count]
-
-            return []
+            # JSON mode guarantees a bare JSON object, no code fence to strip
+            payload = orjson.loads(response.choices[0].message.content)
+            questions = [
+                q for q in payload.get("questions", []) if isinstance(q, str)
+            ][:count]
+            if questions:
+                _suggestion_cache[cache_key] = questions
+                if len(_suggestion_cache) > _SUGGESTION_CACHE_MAX:
+                    _suggestion_cache.popitem(last=False)
+            return questions
 
         except Exception as e:
-            print(f"Failed to generate suggested questions (OpenAI): {e}")
+            logger.warning("Failed to generate suggested questions (OpenAI): %s", e)
             return []
 
 
@@ -1,4 +1,6 @@
-from typing import List, Optional, Dict
+from collections import defaultdict
+from types import MappingProxyType
+from typing import DefaultDict, List, Mapping, Optional, Dict
 import uuid
 import logging
 
@@ -7,6 +9,16 @@ from app.services.document_service import get_document_service
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on attachment text sent to the model per turn (~75k tokens).
+# Keeps prompts within every provider's context window and stops a pile of
+# large attachments from being re-sent, in full, on every turn.
+_MAX_CONTEXT_CHARS = 300_000
+_TRUNCATION_NOTE = "\n\n[... attachment truncated to fit the context limit]"
+
+# Read-only stand-in for a discussion with no attachments; lookups use it
+# instead of indexing the defaultdicts, which would insert an empty bucket.
+_EMPTY: Mapping = MappingProxyType({})
+
 
 class AttachmentService:
     """Service for managing discussion-scoped file attachments.
@@ -18,7 +30,10 @@ class AttachmentService:
 
     def __init__(self):
         # discussion_id -> { attachment_id -> Attachment }
-        self._attachments: Dict[str, Dict[str, Attachment]] = {}
+        self._attachments: DefaultDict[str, Dict[str, Attachment]] = defaultdict(dict)
+        # Same layout, holding only the metadata. Listing reads these and
+        # never touches the (possibly multi-MB) text and chunks.
+        self._summaries: DefaultDict[str, Dict[str, AttachmentSummary]] = defaultdict(dict)
 
     def _doc_service(self):
         """Lazy access to DocumentService for text extraction / chunking."""
@@ -35,7 +50,7 @@ class AttachmentService:
         ds = self._doc_service()
 
         # Extract text using the shared pipeline
-        full_text = ds._extract_text(content, content_type, filename)
+        full_text = await ds.extract_text(content, content_type, filename)
 
         # Chunk the text using the shared pipeline
         raw_chunks = ds._chunk_text(full_text)
@@ -63,7 +78,10 @@ class AttachmentService:
             chunks=chunks,
         )
 
-        self._attachments.setdefault(discussion_id, {})[attachment_id] = attachment
+        self._attachments[discussion_id][attachment_id] = attachment
+        self._summaries[discussion_id][attachment_id] = (
+            AttachmentSummary.from_attachment(attachment)
+        )
         logger.info(
             "Attachment added: %s (%d chunks) to discussion %s",
             filename,
@@ -74,18 +92,18 @@ class AttachmentService:
 
     def list_attachments(self, discussion_id: str) -> List[AttachmentSummary]:
         """Return lightweight summaries for all attachments in a discussion."""
-        bucket = self._attachments.get(discussion_id, {})
-        return [AttachmentSummary.from_attachment(a) for a in bucket.values()]
+        return list(self._summaries.get(discussion_id, _EMPTY).values())
 
     def get_attachment(self, discussion_id: str, attachment_id: str) -> Optional[Attachment]:
         """Get a single attachment with full text and chunks."""
-        return self._attachments.get(discussion_id, {}).get(attachment_id)
+        return self._attachments.get(discussion_id, _EMPTY).get(attachment_id)
 
     def delete_attachment(self, discussion_id: str, attachment_id: str) -> bool:
         """Remove an attachment from a discussion. Returns True if found."""
-        bucket = self._attachments.get(discussion_id, {})
-        if attachment_id in bucket:
+        bucket = self._attachments.get(discussion_id)
+        if bucket and attachment_id in bucket:
             del bucket[attachment_id]
+            self._summaries[discussion_id].pop(attachment_id, None)
             logger.info("Attachment deleted: %s from discussion %s", attachment_id, discussion_id)
             return True
         return False
@@ -104,7 +122,7 @@ class AttachmentService:
         Returns:
             Formatted string with each attachment's content labelled by filename.
         """
-        bucket = self._attachments.get(discussion_id, {})
+        bucket = self._attachments.get(discussion_id, _EMPTY)
         if not bucket:
             return ""
 
@@ -116,15 +134,32 @@ class AttachmentService:
         if not attachments:
             return ""
 
-        parts = []
-        for att in attachments:
-            parts.append(f"[Attached File: {att.filename}]:\n{att.full_text}")
-
-        return "\n\n---\n\n".join(parts)
+        # One join over all the pieces copies each (possibly multi-MB)
+        # full_text once; a per-attachment f-string would copy it twice.
+        pieces = []
+        budget = _MAX_CONTEXT_CHARS
+        for i, att in enumerate(attachments):
+            if budget <= 0:
+                logger.info(
+                    "Attachment context limit reached; omitted %d of %d attachments",
+                    len(attachments) - i,
+                    len(attachments),
+                )
+                break
+            if i:
+                pieces.append("\n\n---\n\n")
+            text = att.full_text
+            if len(text) > budget:
+                text = text[:budget] + _TRUNCATION_NOTE
+            budget -= len(att.full_text)
+            pieces += ("[Attached File: ", att.filename, "]:\n", text)
+
+        return "".join(pieces)
 
     def delete_discussion_attachments(self, discussion_id: str) -> int:
         """Remove all attachments for a discussion. Returns count deleted."""
-        bucket = self._attachments.pop(discussion_id, {})
+        bucket = self._attachments.pop(discussion_id, _EMPTY)
+        self._summaries.pop(discussion_id, None)
         return len(bucket)
 
 
@@ -4,11 +4,17 @@ import logging
 from datetime import datetime
 from typing import List, Optional
 
+from pydantic import TypeAdapter
+
 from app.database.supabase_client import get_supabase_client
-from app.models import Discussion, Message, MessageRole, DocumentSource
+from app.models import Discussion, Message, MessageRole, DocumentSource, ROLE_VALUES
 
 logger = logging.getLogger(__name__)
 
+# (De)serializes a message's sources in one call into pydantic-core rather
+# than a Python-level loop over DocumentSource instances.
+_SOURCES_ADAPTER = TypeAdapter(List[DocumentSource])
+
 # Singleton instance
 _discussion_service: Optional["DiscussionService"] = None
 
@@ -32,28 +38,24 @@ class DiscussionService:
         return [self._row_to_discussion(r) for r in (resp.data or [])]
 
     def get_discussion(self, discussion_id: str, user_id: str) -> Optional[Discussion]:
+        # Messages are embedded through the messages.discussion_id foreign
+        # key, so the discussion and its history come back in one request.
         resp = (
             self._client.table("discussions")
-            .select("*")
+            .select("*, messages(*)")
             .eq("id", discussion_id)
             .eq("user_id", user_id)
+            .order("created_at", desc=False, foreign_table="messages")
             .maybe_single()
             .execute()
         )
-        if not resp.data:
+        if not resp or not resp.data:
             return None
 
         discussion = self._row_to_discussion(resp.data)
-
-        # Fetch messages
-        msg_resp = (
-            self._client.table("messages")
-            .select("*")
-            .eq("discussion_id", discussion_id)
-            .order("created_at", desc=False)
-            .execute()
-        )
-        discussion.messages = [self._row_to_message(m) for m in (msg_resp.data or [])]
+        discussion.messages = [
+            self._row_to_message(m) for m in (resp.data.get("messages") or [])
+        ]
         return discussion
 
     def create_discussion(self, user_id: str, title: str = "New Chat") -> Discussion:
@@ -116,13 +118,13 @@ class DiscussionService:
         row = {
             "id": message.id,
             "discussion_id": discussion_id,
-            "role": message.role.value,
+            "role": ROLE_VALUES[message.role],
             "content": message.content,
             "provider": message.provider,
             "tokens_used": message.tokens_used,
             "response_time_ms": message.response_time_ms,
             "sources": (
-                [s.model_dump() for s in message.sources]
+                _SOURCES_ADAPTER.dump_python(message.sources, mode="json")
                 if message.sources
                 else None
             ),
@@ -130,12 +132,38 @@ class DiscussionService:
             "suggested_questions": message.suggested_questions,
             "intent": message.intent,
         }
+        # The touch_discussion_on_message trigger bumps the discussion's
+        # updated_at in the same transaction (see supabase_schema.sql, and
+        # migrations/001_touch_discussion_on_message.sql for existing databases).
         self._client.table("messages").insert(row).execute()
 
-        # Touch discussion updated_at
-        self._client.table("discussions").update(
-            {"updated_at": datetime.utcnow().isoformat()}
-        ).eq("id", discussion_id).execute()
+    def list_messages(
+        self, discussion_id: str, user_id: str, offset: int = 0, limit: int = 50
+    ) -> Optional[List[Message]]:
+        """Return one page of a discussion's messages, oldest first.
+
+        Returns None if the discussion doesn't exist or belongs to another user.
+        """
+        owner = (
+            self._client.table("discussions")
+            .select("id")
+            .eq("id", discussion_id)
+            .eq("user_id", user_id)
+            .maybe_single()
+            .execute()
+        )
+        if not owner or not owner.data:
+            return None
+
+        resp = (
+            self._client.table("messages")
+            .select("*")
+            .eq("discussion_id", discussion_id)
+            .order("created_at", desc=False)
+            .range(offset, offset + limit - 1)
+            .execute()
+        )
+        return [self._row_to_message(m) for m in (resp.data or [])]
 
     def get_context_messages(
         self, discussion_id: str, limit: int = 20
@@ -169,7 +197,7 @@ class DiscussionService:
     def _row_to_message(row: dict) -> Message:
         sources = None
         if row.get("sources"):
-            sources = [DocumentSource(**s) for s in row["sources"]]
+            sources = _SOURCES_ADAPTER.validate_python(row["sources"])
 
         return Message(
             id=row["id"],
@@ -1,16 +1,25 @@
 from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import tiktoken
+import asyncio
+import os
 import uuid
 import logging
 import re
 import json
-from pypdf import PdfReader
-from docx import Document as DocxDocument
+import multiprocessing
+import threading
+import time
+from lxml import etree
 import io
+import zipfile
 
 from app.models.document import Document, DocumentChunk
 from app.services.pinecone_service import get_pinecone_service
+from app.workers.pdf_text import count_pdf_pages, extract_pdf_pages
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +27,103 @@ logger = logging.getLogger(__name__)
 _REGISTRY_DIR = Path(__file__).resolve().parent.parent.parent / "data"
 _REGISTRY_PATH = _REGISTRY_DIR / "document_registry.json"
 
+# Pinecone fetch accepts at most 100 IDs per call; bootstrap keeps this many
+# fetches in flight at once.
+_FETCH_BATCH_SIZE = 100
+_FETCH_CONCURRENCY = 16
+
+# Chunks never change after ingest, so a document's chunks are kept briefly
+# for the preview calls that follow one another.  Chunk lists can be large,
+# hence the small bound.
+_CHUNK_CACHE_TTL = 300.0
+_CHUNK_CACHE_MAX = 32
+
+# Token counts for short texts (headers, footers, list bullets) repeat across
+# and within documents, so they are remembered.  Longer texts rarely recur.
+_TOKEN_CACHE_MAX = 50_000
+_TOKEN_CACHE_MAX_CHARS = 512
+
+# Terminal punctuation, taking runs ("...", "?!") and any closing quotes or
+# brackets with it so they stay on the sentence they end.
+_SENTENCE_END_RE = re.compile(r"[.!?]+[\"'\u201d\u2019)\]]*")
+
+# WordprocessingML elements read when streaming a DOCX body
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_R, _W_HYPERLINK = _W + "body", _W + "p", _W + "r", _W + "hyperlink"
+_W_T, _W_BR, _W_BR_TYPE = _W + "t", _W + "br", _W + "type"
+# Run children and their text, as python-docx renders Run.text
+_W_RUN_TEXT = {
+    _W + "tab": "\t",
+    _W + "ptab": "\t",
+    _W + "cr": "\n",
+    _W + "noBreakHyphen": "-",
+}
+
+# tiktoken downloads its BPE files into the system temp dir by default, which
+# is often wiped between deploys; keep them next to the registry instead.
+_TIKTOKEN_CACHE_DIR = _REGISTRY_DIR / "tiktoken"
+
+
+@lru_cache(maxsize=4)
+def _get_tokenizer(name: str = "cl100k_base") -> tiktoken.Encoding:
+    """Load a tiktoken encoding once per process."""
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(_TIKTOKEN_CACHE_DIR))
+    return tiktoken.get_encoding(name)
+
+
+# PDFium isn't thread-safe: inline extraction is serialised by a lock, and
+# long PDFs are split across worker processes instead.  Shorter ones aren't
+# worth the hand-off and are read inline.
+_PDF_PARALLEL_MIN_PAGES = 64
+_PDF_MAX_WORKERS = min(4, os.cpu_count() or 1)
+_pdfium_lock = threading.Lock()
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+# Extraction runs in worker threads, so creation must not race
+_pdf_executor_lock = threading.Lock()
+
+
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            # Spawned, not forked: forking the threaded server process (HTTP
+            # pool, log listener thread, PDFium state) can deadlock the child.
+            # Workers only import the leaf app.workers.pdf_text module.
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=_PDF_MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_executor
+
+
+def shutdown_pdf_executor() -> None:
+    """Stop the PDF worker processes (called on application shutdown)."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        executor, _pdf_executor = _pdf_executor, None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
 
 class DocumentService:
     """Service for processing and managing documents."""
 
     def __init__(self):
         self.pinecone = get_pinecone_service()
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        self.tokenizer = _get_tokenizer()
         self.max_chunk_tokens = 500
         self.chunk_overlap = 50
+        self._token_cache: Dict[str, int] = {}
+        # document_id -> (fetched_at, sorted chunks)
+        self._chunk_cache: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
         # In-memory cache — hydrated from disk on startup
         self._documents: Dict[str, Document] = {}
         self._load_registry()
+        # Set once the registry is usable: immediately when loaded from disk,
+        # otherwise when the (background) Pinecone bootstrap finishes.
+        self._registry_ready = asyncio.Event()
+        if self._documents:
+            self._registry_ready.set()
         # Instructor → document_ids index for entity-first retrieval
         self.instructor_index: Dict[str, List[str]] = {}
         self._build_instructor_index()
@@ -140,6 +234,26 @@ class DocumentService:
 
         Returns the number of new documents discovered.
         """
+        try:
+            return await self._bootstrap_registry()
+        finally:
+            self._registry_ready.set()
+
+    async def wait_for_registry(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the registry to be populated.
+
+        Returns False if a startup bootstrap is still running after the timeout;
+        callers then serve whatever the registry holds so far.
+        """
+        if self._registry_ready.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self._registry_ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _bootstrap_registry(self) -> int:
         logger.info("Bootstrapping document registry from Pinecone...")
 
         # Step 1: List all vector IDs
@@ -164,18 +278,27 @@ class DocumentService:
             logger.info("Registry already contains all Pinecone documents")
             return 0
 
-        # Step 4: Fetch one representative vector per new document to get metadata
-        discovered = 0
-        # Batch fetch in groups of 100 (Pinecone limit)
+        # Step 4: Fetch one representative vector per new document to get metadata.
+        # Batches of 100 (Pinecone limit) are fetched concurrently.
         representative_ids = [doc_chunks[did][0] for did in new_doc_ids]
-        for i in range(0, len(representative_ids), 100):
-            batch = representative_ids[i : i + 100]
-            try:
-                fetched = await self.pinecone.fetch_vectors(batch)
-            except Exception as e:
-                logger.warning(f"Failed to fetch vector batch: {e}")
-                continue
+        batches = [
+            representative_ids[i : i + _FETCH_BATCH_SIZE]
+            for i in range(0, len(representative_ids), _FETCH_BATCH_SIZE)
+        ]
+        semaphore = asyncio.Semaphore(_FETCH_CONCURRENCY)
+
+        async def _fetch(batch: List[str]) -> Dict[str, Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self.pinecone.fetch_vectors(batch)
+                except Exception as e:
+                    logger.warning(f"Failed to fetch vector batch: {e}")
+                    return {}
+
+        fetched_batches = await asyncio.gather(*(_fetch(batch) for batch in batches))
 
+        discovered = 0
+        for fetched in fetched_batches:
             for vid, vec_data in fetched.items():
                 metadata = vec_data.get("metadata", {})
                 # Recover the document_id from the vector ID
@@ -220,13 +343,21 @@ class DocumentService:
         Returns:
             List of chunks sorted by chunk_index, or empty list if not found
         """
+        cached = self._chunk_cache.get(document_id)
+        if cached is not None:
+            fetched_at, chunks = cached
+            if time.monotonic() - fetched_at < _CHUNK_CACHE_TTL:
+                self._chunk_cache.move_to_end(document_id)
+                return chunks
+            del self._chunk_cache[document_id]
+
         try:
             chunks = await self.pinecone.get_chunks_by_document(document_id)
             if not chunks:
                 return []
 
             # Sort by chunk_index for consistent ordering
-            return sorted(
+            chunks = sorted(
                 chunks,
                 key=lambda c: c.get("metadata", {}).get("chunk_index", 0)
             )
@@ -234,6 +365,11 @@ class DocumentService:
             logger.error(f"Failed to fetch chunks from Pinecone for {document_id}: {e}")
             return []
 
+        self._chunk_cache[document_id] = (time.monotonic(), chunks)
+        if len(self._chunk_cache) > _CHUNK_CACHE_MAX:
+            self._chunk_cache.popitem(last=False)
+        return chunks
+
     def _reconstruct_document_from_chunks(
         self,
         document_id: str,
@@ -266,7 +402,47 @@ class DocumentService:
 
     def _count_tokens(self, text: str) -> int:
         """Count tokens in text."""
-        return len(self.tokenizer.encode(text))
+        count = self._token_cache.get(text)
+        if count is None:
+            count = len(self.tokenizer.encode_ordinary(text))
+            self._remember_token_counts({text: count})
+        return count
+
+    def _remember_token_counts(self, counts: Dict[str, int]) -> None:
+        """Cache the counts of short texts, starting over once the cache is full."""
+        cache = self._token_cache
+        if len(cache) >= _TOKEN_CACHE_MAX:
+            cache.clear()
+        cache.update(
+            (t, n) for t, n in counts.items() if len(t) <= _TOKEN_CACHE_MAX_CHARS
+        )
+
+    def _count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Count tokens for many texts in a single tokenizer call."""
+        cache = self._token_cache
+        counts: Dict[str, int] = {}
+        uncached = []
+        for t in dict.fromkeys(texts):
+            if t in cache:
+                counts[t] = cache[t]
+            else:
+                uncached.append(t)
+
+        fresh: Dict[str, int] = {}
+        if len(uncached) == 1:
+            # tiktoken starts a thread pool per batch call; not worth it for one text
+            fresh = {uncached[0]: len(self.tokenizer.encode_ordinary(uncached[0]))}
+        elif uncached:
+            # One batched call tokenizes in parallel inside tiktoken instead
+            # of crossing into it once per text.
+            fresh = dict(zip(
+                uncached,
+                map(len, self.tokenizer.encode_ordinary_batch(uncached)),
+            ))
+        if fresh:
+            self._remember_token_counts(fresh)
+            counts.update(fresh)
+        return [counts[t] for t in texts]
 
     def _chunk_text(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -279,11 +455,12 @@ class DocumentService:
 
         chunks = []
         current_chunk_parts = []
+        current_part_tokens = []
         current_tokens = 0
 
-        for para in paragraphs:
-            para_text = para["content"]
-            para_tokens = self._count_tokens(para_text)
+        para_token_counts = self._count_tokens_batch([p["content"] for p in paragraphs])
+
+        for para, para_tokens in zip(paragraphs, para_token_counts):
 
             # If single paragraph exceeds limit, split by sentences
             if para_tokens > self.max_chunk_tokens:
@@ -291,20 +468,25 @@ class DocumentService:
                 if current_chunk_parts:
                     chunks.append(self._merge_chunk_parts(current_chunk_parts))
                     current_chunk_parts = []
+                    current_part_tokens = []
                     current_tokens = 0
 
                 # Split large paragraph into sentence-based chunks
                 sentence_chunks = self._split_paragraph_by_sentences(para)
                 chunks.extend(sentence_chunks)
             elif current_tokens + para_tokens > self.max_chunk_tokens:
-                # Flush current chunk and start new one
+                # Flush current chunk and start new one, repeating its
+                # trailing paragraphs as overlap
                 if current_chunk_parts:
                     chunks.append(self._merge_chunk_parts(current_chunk_parts))
-                current_chunk_parts = [para]
-                current_tokens = para_tokens
+                keep = self._overlap_start(current_part_tokens, para_tokens)
+                current_chunk_parts = current_chunk_parts[keep:] + [para]
+                current_part_tokens = current_part_tokens[keep:] + [para_tokens]
+                current_tokens = sum(current_part_tokens)
             else:
                 # Add to current chunk
                 current_chunk_parts.append(para)
+                current_part_tokens.append(para_tokens)
                 current_tokens += para_tokens
 
         # Flush remaining
@@ -369,34 +551,55 @@ class DocumentService:
         text = para["content"]
         para_type = para["type"]
 
-        # Simple sentence split (handles common cases)
+        # Simple sentence split (handles common cases): break after
+        # terminal punctuation once the sentence is over 20 characters.
+        # Jumping between punctuation marks avoids a Python step per character.
         sentences = []
-        current = ""
-        for char in text:
-            current += char
-            if char in '.!?' and len(current) > 20:
-                sentences.append(current.strip())
-                current = ""
-        if current.strip():
-            sentences.append(current.strip())
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(text):
+            end = match.end()
+            if end - start > 20:
+                sentences.append(text[start:end].strip())
+                start = end
+        tail = text[start:].strip()
+        if tail:
+            sentences.append(tail)
 
         # Group sentences into chunks
         chunks = []
         current_chunk = []
+        current_sentence_tokens = []
         current_tokens = 0
 
-        for sentence in sentences:
-            sent_tokens = self._count_tokens(sentence)
-            if current_tokens + sent_tokens > self.max_chunk_tokens:
+        for sentence, sent_tokens in zip(sentences, self._count_tokens_batch(sentences)):
+            if sent_tokens > self.max_chunk_tokens:
+                # No sentence break to split on (tables, run-on extractions):
+                # fall back to overlapping token windows.
+                if current_chunk:
+                    chunks.append({
+                        "content": ' '.join(current_chunk),
+                        "type": para_type
+                    })
+                    current_chunk = []
+                    current_sentence_tokens = []
+                    current_tokens = 0
+                chunks.extend(
+                    {"content": window, "type": para_type}
+                    for window in self._split_by_token_window(sentence)
+                )
+            elif current_tokens + sent_tokens > self.max_chunk_tokens:
                 if current_chunk:
                     chunks.append({
                         "content": ' '.join(current_chunk),
                         "type": para_type
                     })
-                current_chunk = [sentence]
-                current_tokens = sent_tokens
+                keep = self._overlap_start(current_sentence_tokens, sent_tokens)
+                current_chunk = current_chunk[keep:] + [sentence]
+                current_sentence_tokens = current_sentence_tokens[keep:] + [sent_tokens]
+                current_tokens = sum(current_sentence_tokens)
             else:
                 current_chunk.append(sentence)
+                current_sentence_tokens.append(sent_tokens)
                 current_tokens += sent_tokens
 
         if current_chunk:
@@ -407,6 +610,46 @@ class DocumentService:
 
         return chunks
 
+    def _overlap_start(self, part_tokens: List[int], next_tokens: int) -> int:
+        """
+        Index of the first trailing part to repeat at the start of the next chunk.
+
+        Keeps whole parts totalling at most chunk_overlap tokens (and leaving
+        room for the next part), but never the entire previous chunk.
+        """
+        budget = min(self.chunk_overlap, self.max_chunk_tokens - next_tokens)
+        start = len(part_tokens)
+        total = 0
+        while start > 1 and total + part_tokens[start - 1] <= budget:
+            start -= 1
+            total += part_tokens[start]
+        return start
+
+    def _split_by_token_window(self, text: str) -> List[str]:
+        """Split text into windows of max_chunk_tokens overlapping by chunk_overlap."""
+        ids = self.tokenizer.encode_ordinary(text)
+        pieces = self.tokenizer.decode_tokens_bytes(ids)
+        size = self.max_chunk_tokens
+        stride = size - self.chunk_overlap
+
+        def char_boundary(i: int) -> int:
+            # BPE tokens can split a multi-byte UTF-8 character; step back
+            # off tokens that start on a continuation byte so no cut lands
+            # mid-character (decoding would leave U+FFFD on both sides)
+            while 0 < i < len(pieces) and pieces[i][:1] and pieces[i][0] & 0xC0 == 0x80:
+                i -= 1
+            return i
+
+        windows = []
+        # Stop before a trailing window that would only repeat the overlap
+        for start in range(0, max(len(ids) - self.chunk_overlap, 1), stride):
+            end = min(start + size, len(ids))
+            lo, hi = char_boundary(start), char_boundary(end)
+            if hi <= lo:
+                hi = end
+            windows.append(b"".join(pieces[lo:hi]).decode("utf-8", errors="replace").strip())
+        return windows
+
     def _merge_chunk_parts(self, parts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Merge multiple paragraph parts into a single chunk."""
         if not parts:
@@ -427,16 +670,35 @@ class DocumentService:
         return {"content": content, "type": chunk_type}
 
     def _extract_text_from_pdf(self, content: bytes) -> str:
-        """Extract text from PDF content with cleanup and normalization."""
-        reader = PdfReader(io.BytesIO(content))
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text += page_text + "\n"
+        """Extract text from PDF content with cleanup and normalization.
+
+        Blocks until extraction finishes; async callers should run it via
+        extract_text().
+        """
+        with _pdfium_lock:
+            page_count = count_pdf_pages(content)
+
+            inline = page_count < _PDF_PARALLEL_MIN_PAGES or _PDF_MAX_WORKERS < 2
+            if inline:
+                page_texts = extract_pdf_pages(content, 0, page_count)
+
+        if not inline:
+            # One contiguous page range per worker, so each parses the file once
+            step = -(-page_count // _PDF_MAX_WORKERS)
+            starts = range(0, page_count, step)
+            page_texts = [
+                text
+                for texts in _get_pdf_executor().map(
+                    extract_pdf_pages,
+                    [content] * len(starts),
+                    starts,
+                    [min(start + step, page_count) for start in starts],
+                )
+                for text in texts
+            ]
 
         # Clean up the extracted text
-        text = self._clean_pdf_text(text)
-        return text
+        return self._clean_pdf_text("\n".join(page_texts) + "\n")
 
     def _clean_pdf_text(self, text: str) -> str:
         """
@@ -550,11 +812,56 @@ class DocumentService:
 
     def _extract_text_from_docx(self, content: bytes) -> str:
         """Extract text from DOCX content."""
-        doc = DocxDocument(io.BytesIO(content))
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        # Stream word/document.xml and drop each top-level paragraph once
+        # read, rather than building python-docx's object model for the
+        # whole file.  Matches its Document.paragraphs text: body paragraphs
+        # only (not tables or text boxes), from direct runs and hyperlinks.
+        parts = []
+        with zipfile.ZipFile(io.BytesIO(content)) as package:
+            with package.open("word/document.xml") as xml:
+                # Uploaded XML is untrusted: no entity expansion, no network
+                # fetches, and lxml's default limits against huge trees.
+                for _, p in etree.iterparse(
+                    xml,
+                    tag=_W_P,
+                    resolve_entities=False,
+                    no_network=True,
+                    huge_tree=False,
+                ):
+                    body = p.getparent()
+                    if body is None or body.tag != _W_BODY:
+                        continue
+                    for child in p:
+                        if child.tag == _W_R:
+                            self._append_run_text(child, parts)
+                        elif child.tag == _W_HYPERLINK:
+                            for run in child.iterchildren(_W_R):
+                                self._append_run_text(run, parts)
+                    parts.append("\n")
+                    # Free this paragraph and anything before it (tables)
+                    p.clear()
+                    while p.getprevious() is not None:
+                        del body[0]
+        return "".join(parts)
+
+    @staticmethod
+    def _append_run_text(run, parts: List[str]) -> None:
+        """Append the text of a w:r element, rendered as python-docx does."""
+        for child in run:
+            tag = child.tag
+            if tag == _W_T:
+                if child.text:
+                    parts.append(child.text)
+            elif tag == _W_BR:
+                # Line breaks only; page and column breaks carry no text
+                if child.get(_W_BR_TYPE, "textWrapping") == "textWrapping":
+                    parts.append("\n")
+            elif tag in _W_RUN_TEXT:
+                parts.append(_W_RUN_TEXT[tag])
+
+    async def extract_text(self, content: bytes, content_type: str, filename: str) -> str:
+        """Extract text off the event loop (parsing is CPU-bound and may wait on worker processes)."""
+        return await asyncio.to_thread(self._extract_text, content, content_type, filename)
 
     def _extract_text(self, content: bytes, content_type: str, filename: str) -> str:
         """Extract text from document based on type."""
@@ -563,7 +870,9 @@ class DocumentService:
         elif content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or filename.endswith(".docx"):
             return self._extract_text_from_docx(content)
         elif content_type.startswith("text/") or filename.endswith((".txt", ".md")):
-            return content.decode("utf-8")
+            # utf-8-sig drops a leading BOM during the decode itself (no
+            # slice copy); stray invalid bytes shouldn't fail the upload.
+            return content.decode("utf-8-sig", errors="replace")
         else:
             raise ValueError(f"Unsupported content type: {content_type}")
 
@@ -594,7 +903,7 @@ class DocumentService:
         )
 
         # Extract text
-        text = self._extract_text(content, content_type, filename)
+        text = await self.extract_text(content, content_type, filename)
 
         # Chunk the text (now returns structured chunks with type)
         chunks = self._chunk_text(text)
@@ -605,12 +914,10 @@ class DocumentService:
         embeddings = await self.pinecone.create_embeddings_batch(chunk_contents)
 
         # Prepare vectors for Pinecone with structure metadata
-        vectors = []
-        chunk_ids = []
-        for i, (chunk_data, embedding) in enumerate(zip(chunks, embeddings)):
-            chunk_id = f"{doc_id}_{i}"
-            chunk_ids.append(chunk_id)
-            vectors.append({
+        id_prefix = doc_id + "_"
+        chunk_ids = [id_prefix + str(i) for i in range(len(embeddings))]
+        vectors = [
+            {
                 "id": chunk_id,
                 "values": embedding,
                 "metadata": {
@@ -620,7 +927,9 @@ class DocumentService:
                     "content": chunk_data["content"],
                     "content_type": chunk_data["type"]  # heading, paragraph, list
                 }
-            })
+            }
+            for i, (chunk_id, chunk_data, embedding) in enumerate(zip(chunk_ids, chunks, embeddings))
+        ]
 
         # Upsert to Pinecone
         await self.pinecone.upsert_vectors(vectors)
@@ -659,6 +968,7 @@ class DocumentService:
 
         # Remove from cache and persist
         self._documents.pop(document_id, None)
+        self._chunk_cache.pop(document_id, None)
         self._save_registry()
         return True
 
@@ -680,6 +990,10 @@ class DocumentService:
         """List all documents."""
         return list(self._documents.values())
 
+    def get_registered_document(self, document_id: str) -> Optional[Document]:
+        """Get a document from the local registry only (no Pinecone fallback)."""
+        return self._documents.get(document_id)
+
     async def search_documents(
         self,
         query: str,
@@ -5,9 +5,18 @@ import asyncio
 import logging
 
 from app.core.config import get_settings
+from app.utils.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+# Inputs per embeddings request, and how many requests may be in flight at
+# once while ingesting a large document.
+_EMBED_BATCH_SIZE = 100
+_EMBED_CONCURRENCY = 4
+
+# Vectors per Pinecone upsert request (keeps each request well under 2MB)
+_UPSERT_BATCH_SIZE = 100
+
 
 class PineconeService:
     """Service for interacting with Pinecone vector database."""
@@ -57,7 +66,10 @@ class PineconeService:
     def _get_openai(self) -> AsyncOpenAI:
         """Get OpenAI client for embeddings."""
         if self._openai_client is None:
-            self._openai_client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+            self._openai_client = AsyncOpenAI(
+                api_key=self.settings.openai_api_key,
+                http_client=get_http_client(),
+            )
         return self._openai_client
 
     async def create_embedding(self, text: str) -> List[float]:
@@ -70,13 +82,29 @@ class PineconeService:
         return response.data[0].embedding
 
     async def create_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Create embeddings for multiple texts."""
+        """Create embeddings for multiple texts.
+
+        Texts are sent in fixed-size batches with a few requests in flight,
+        so a large document neither exceeds the per-request input limit nor
+        waits on one batch at a time.  Output order matches ``texts``.
+        """
         client = self._get_openai()
-        response = await client.embeddings.create(
-            model="text-embedding-3-small",
-            input=texts
-        )
-        return [item.embedding for item in response.data]
+        semaphore = asyncio.Semaphore(_EMBED_CONCURRENCY)
+
+        async def _embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                response = await client.embeddings.create(
+                    model="text-embedding-3-small",
+                    input=batch
+                )
+            return [item.embedding for item in response.data]
+
+        batches = [
+            texts[i : i + _EMBED_BATCH_SIZE]
+            for i in range(0, len(texts), _EMBED_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(_embed(batch) for batch in batches))
+        return [embedding for batch in results for embedding in batch]
 
     async def upsert_vectors(
         self,
@@ -95,7 +123,10 @@ class PineconeService:
         await asyncio.to_thread(
             index.upsert,
             vectors=vectors,
-            namespace=namespace
+            namespace=namespace,
+            batch_size=_UPSERT_BATCH_SIZE,
+            # batch_size otherwise turns on a tqdm progress bar on stderr
+            show_progress=False,
         )
 
     async def query_vectors(
@@ -126,7 +157,7 @@ class PineconeService:
             top_k=top_k,
             namespace=namespace,
             filter=filter,
-            include_metadata=include_metadata
+            include_metadata=include_metadata,
         )
 
         return [
@@ -1,3 +1,13 @@
-from .streaming import create_sse_response
+from .streaming import SSEChunk, coalesce_chunks, create_sse_response, stream_sse_chunks
+from .http_client import get_http_client, close_http_client
+from .upload_limit import UploadSizeLimitMiddleware
 
-__all__ = ["create_sse_response"]
+__all__ = [
+    "SSEChunk",
+    "coalesce_chunks",
+    "create_sse_response",
+    "stream_sse_chunks",
+    "get_http_client",
+    "close_http_client",
+    "UploadSizeLimitMiddleware",
+]
@@ -0,0 +1,46 @@
+"""Process-wide HTTP connection pool for outbound API calls.
+
+Every provider SDK (OpenAI, Anthropic, Mistral, Cohere) would otherwise
+create its own httpx client with its own connection pool.  Sharing one
+client lets keep-alive connections and TLS sessions be reused across
+providers and across requests.
+"""
+from typing import Optional
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Global client instance
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared async HTTP client."""
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=200,
+                max_connections=500,
+                keepalive_expiry=300,
+            ),
+            # LLM streams can pause between tokens; keep read generous,
+            # fail fast on connect.
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+        logger.info("Shared HTTP client initialized")
+
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called on application shutdown)."""
+    global _http_client
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -1,18 +1,73 @@
-from typing import AsyncGenerator, Any
-import json
+from typing import AsyncGenerator, AsyncIterable, Any, NamedTuple, Optional
 import logging
+import time
 import traceback
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
-async def create_sse_response(
+def _sse(payload: dict) -> bytes:
+    """Encode a payload as one SSE data frame."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+async def coalesce_chunks(
+    source: AsyncIterable[str],
+    max_wait: float = 0.015,
+    max_chars: int = 512,
+) -> AsyncGenerator[str, None]:
+    """
+    Merge text deltas that arrive in quick succession into fewer, larger chunks.
+
+    A delta is released straight away when `max_wait` seconds have passed
+    since the last release (so the first token is never held); otherwise it
+    is buffered until that window elapses or `max_chars` characters pile up,
+    and whatever remains is released when the source ends.  No timers are
+    involved, so buffered text waits at most for the next delta: the source
+    is consumed in the caller's task, so SDK streams that hold task-bound
+    resources (anyio cancel scopes) keep working.
+
+    Args:
+        source: Async iterable of text deltas
+        max_wait: Seconds after a release during which deltas are merged
+        max_chars: Buffer size that forces a release
+
+    Yields:
+        Concatenated text chunks
+    """
+    buf = []
+    size = 0
+    last_flush = float("-inf")
+    async for text in source:
+        buf.append(text)
+        size += len(text)
+        now = time.monotonic()
+        if size >= max_chars or now - last_flush >= max_wait:
+            yield "".join(buf)
+            buf.clear()
+            size = 0
+            last_flush = now
+    if buf:
+        yield "".join(buf)
+
+
+class SSEChunk(NamedTuple):
+    """One SSE frame plus the text it carries (None for non-chunk events)."""
+    content: Optional[str]
+    payload: bytes
+
+
+async def stream_sse_chunks(
     generator: AsyncGenerator[str, None],
     provider: str,
     send_done: bool = True
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[SSEChunk, None]:
     """
-    Create SSE formatted response from a generator.
+    Create SSE frames from a generator, keeping each frame's raw text.
+
+    Lets callers accumulate the response without parsing frames back.
 
     Args:
         generator: Async generator yielding text chunks
@@ -20,39 +75,55 @@ async def create_sse_response(
         send_done: Whether to send the done event (default: True)
 
     Yields:
-        SSE formatted strings
+        SSEChunk(content, payload) pairs
     """
     try:
         async for chunk in generator:
             # Format as SSE event
-            data = json.dumps({
+            yield SSEChunk(chunk, _sse({
                 "type": "chunk",
                 "content": chunk,
                 "provider": provider
-            })
-            yield f"data: {data}\n\n"
+            }))
     except Exception as e:
         # Log the full error with traceback
         logger.error(f"Streaming error from {provider}: {type(e).__name__}: {e}")
         logger.error(traceback.format_exc())
         # Send error event
-        error_data = json.dumps({
+        yield SSEChunk(None, _sse({
             "type": "error",
             "error": f"{type(e).__name__}: {str(e)}",
             "provider": provider
-        })
-        yield f"data: {error_data}\n\n"
+        }))
     finally:
         # Send done event only if requested
         if send_done:
-            done_data = json.dumps({
+            yield SSEChunk(None, _sse({
                 "type": "done",
                 "provider": provider
-            })
-            yield f"data: {done_data}\n\n"
+            }))
+
+
+async def create_sse_response(
+    generator: AsyncGenerator[str, None],
+    provider: str,
+    send_done: bool = True
+) -> AsyncGenerator[bytes, None]:
+    """
+    Create SSE formatted response from a generator.
+
+    Args:
+        generator: Async generator yielding text chunks
+        provider: Name of the AI provider
+        send_done: Whether to send the done event (default: True)
+
+    Yields:
+        SSE formatted frames, already UTF-8 encoded
+    """
+    async for _, payload in stream_sse_chunks(generator, provider, send_done):
+        yield payload
 
 
-def format_sse_event(event_type: str, data: Any) -> str:
+def format_sse_event(event_type: str, data: Any) -> bytes:
     """Format a single SSE event."""
-    payload = json.dumps({"type": event_type, **data})
-    return f"data: {payload}\n\n"
+    return _sse({"type": event_type, **data})
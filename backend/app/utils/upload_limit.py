@@ -0,0 +1,88 @@
+"""ASGI middleware capping the size of multipart upload bodies.
+
+FastAPI parses (and spools) the whole multipart form for an ``UploadFile``
+parameter before the route handler runs, so a size check in the handler only
+fires after the body has already been received.  This middleware enforces the
+cap while the body is still arriving: an oversize Content-Length is refused
+outright, and otherwise the request stream is cut off once it crosses the cap.
+"""
+import orjson
+
+# Largest accepted upload (matches the routes' MAX_FILE_SIZE)
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
+
+# The body also carries multipart boundaries and part headers, so allow a
+# little headroom over the file limit itself.
+_MULTIPART_OVERHEAD = 64 * 1024
+
+_TOO_LARGE_BODY = orjson.dumps({"detail": "File too large. Maximum size is 10MB"})
+
+
+class _BodyTooLarge(Exception):
+    """Raised from receive() once the streamed body crosses the cap."""
+
+
+class UploadSizeLimitMiddleware:
+    """Reject multipart request bodies larger than `max_body_size` with 413."""
+
+    def __init__(self, app, max_body_size: int = MAX_UPLOAD_SIZE + _MULTIPART_OVERHEAD):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_size:
+                    await self._reject(send)
+                    return
+                break
+
+        # Content-Length may be absent or wrong (chunked transfer encoding),
+        # so count the bytes actually received as well
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(send)
+
+    @staticmethod
+    def _is_multipart(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"content-type":
+                return value.startswith(b"multipart/")
+        return False
+
+    @staticmethod
+    async def _reject(send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_TOO_LARGE_BODY)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _TOO_LARGE_BODY})
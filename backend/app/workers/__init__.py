@@ -0,0 +1,2 @@
+# Code run in worker processes. Modules here must stay leaf modules (no app
+# imports) so a spawned worker only loads what the task itself needs.
@@ -0,0 +1,35 @@
+"""PDF text extraction with PDFium, safe to run in spawned worker processes.
+
+Imports nothing but pypdfium2: a spawned worker unpickles these functions by
+importing this module, and pulling in the service layer (settings, Pinecone,
+tiktoken, lxml) would cost every worker hundreds of MB.
+"""
+from typing import List
+
+import pypdfium2 as pdfium
+
+
+def count_pdf_pages(content: bytes) -> int:
+    """Number of pages in a PDF."""
+    pdf = pdfium.PdfDocument(content)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def extract_pdf_pages(content: bytes, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) from a PDF."""
+    pdf = pdfium.PdfDocument(content)
+    try:
+        texts = []
+        for i in range(start, stop):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            # PDFium separates lines with CRLF
+            texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+            textpage.close()
+            page.close()
+        return texts
+    finally:
+        pdf.close()
@@ -0,0 +1,18 @@
+-- ===========================================
+-- Bump discussions.updated_at when a message is added
+-- Safe to re-run. Run this in Supabase SQL Editor on databases created
+-- before the trigger was added to supabase_schema.sql.
+-- ===========================================
+
+CREATE OR REPLACE FUNCTION touch_discussion_on_message()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE discussions SET updated_at = now() WHERE id = NEW.discussion_id;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS touch_discussion_on_message ON messages;
+CREATE TRIGGER touch_discussion_on_message
+  AFTER INSERT ON messages
+  FOR EACH ROW EXECUTE FUNCTION touch_discussion_on_message();
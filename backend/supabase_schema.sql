@@ -131,3 +131,18 @@ CREATE POLICY "Users can delete messages in own discussions"
         AND discussions.user_id = auth.uid()
     )
   );
+
+-- Keep discussions.updated_at current as messages arrive (the discussion
+-- list is ordered by it). Also shipped as migrations/001 for existing databases.
+CREATE OR REPLACE FUNCTION touch_discussion_on_message()
+RETURNS TRIGGER AS $$
+BEGIN
+  UPDATE discussions SET updated_at = now() WHERE id = NEW.discussion_id;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS touch_discussion_on_message ON messages;
+CREATE TRIGGER touch_discussion_on_message
+  AFTER INSERT ON messages
+  FOR EACH ROW EXECUTE FUNCTION touch_discussion_on_message();
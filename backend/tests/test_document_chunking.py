@@ -0,0 +1,70 @@
+"""Tests for DocumentService's token-window chunking."""
+import pytest
+
+document_service = pytest.importorskip("app.services.document_service")
+
+
+class _ByteTokenizer:
+    """One token per UTF-8 byte, so every multi-byte character spans tokens."""
+
+    def encode_ordinary(self, text):
+        return list(text.encode("utf-8"))
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode_tokens_bytes(self, ids):
+        return [bytes([i]) for i in ids]
+
+
+def _make_service(max_chunk_tokens: int, chunk_overlap: int):
+    # Bypass __init__, which connects to Pinecone
+    service = document_service.DocumentService.__new__(document_service.DocumentService)
+    service.tokenizer = _ByteTokenizer()
+    service.max_chunk_tokens = max_chunk_tokens
+    service.chunk_overlap = chunk_overlap
+    service._token_cache = {}
+    return service
+
+
+def test_token_windows_do_not_split_multibyte_characters():
+    text = "Énergie propre — 日本語のテキスト 🌍🌱 naïve café " * 5
+    service = _make_service(max_chunk_tokens=7, chunk_overlap=2)
+
+    windows = service._split_by_token_window(text)
+
+    assert len(windows) > 1
+    for window in windows:
+        assert "\ufffd" not in window
+        assert window in text
+    assert text.startswith(windows[0])
+    assert text.rstrip().endswith(windows[-1])
+
+
+def test_token_windows_keep_ascii_cuts_exact():
+    text = "abcdefghij" * 3
+    service = _make_service(max_chunk_tokens=10, chunk_overlap=2)
+
+    assert service._split_by_token_window(text) == [
+        "abcdefghij",
+        "ijabcdefgh",
+        "ghijabcdef",
+        "efghij",
+    ]
+
+
+def test_sentence_chunks_repeat_trailing_sentences_as_overlap():
+    sentences = [f"Sentence number {i} is here." for i in range(6)]  # 27 bytes each
+    service = _make_service(max_chunk_tokens=60, chunk_overlap=30)
+
+    chunks = service._split_paragraph_by_sentences(
+        {"content": " ".join(sentences), "type": "paragraph"}
+    )
+
+    assert [c["content"] for c in chunks] == [
+        " ".join(sentences[0:2]),
+        " ".join(sentences[1:3]),
+        " ".join(sentences[2:4]),
+        " ".join(sentences[3:5]),
+        " ".join(sentences[4:6]),
+    ]
@@ -57,11 +57,26 @@ CREATE TRIGGER update_discussions_updated_at
 BEFORE UPDATE ON discussions
 FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Function to bump a discussion's updated_at when a message is added
+CREATE OR REPLACE FUNCTION touch_discussion_on_message()
+RETURNS TRIGGER AS $$
+BEGIN
+   UPDATE discussions SET updated_at = NOW() WHERE id = NEW.discussion_id;
+   RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Trigger keeping discussions.updated_at current as messages arrive
+DROP TRIGGER IF EXISTS touch_discussion_on_message ON messages;
+CREATE TRIGGER touch_discussion_on_message
+AFTER INSERT ON messages
+FOR EACH ROW EXECUTE FUNCTION touch_discussion_on_message();
+
 -- Success message
 DO $$
 BEGIN
   RAISE NOTICE 'Database schema created successfully!';
   RAISE NOTICE 'Tables created: users, discussions, messages';
   RAISE NOTICE 'Indexes created: 6 total';
-  RAISE NOTICE 'Trigger created: update_discussions_updated_at';
+  RAISE NOTICE 'Triggers created: update_discussions_updated_at, touch_discussion_on_message';
 END $$;